@@ -32,12 +32,43 @@ TESTS_DIR = ROOT_DIR / "tests"         # 测试目录
 SUPPORTED_IMAGE_FORMATS = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff']
 
 # 支持的数据格式
-SUPPORTED_DATA_FORMATS = ['.csv', '.json', '.xlsx', '.txt', '.pickle']
+SUPPORTED_DATA_FORMATS = ['.csv', '.json', '.jsonl', '.xlsx', '.txt', '.pickle', '.parquet', '.feather', '.arrow']
 
 # 默认输出格式
 DEFAULT_IMAGE_FORMAT = '.png'
 DEFAULT_DATA_FORMAT = '.csv'
 
+# 压缩文件写入级别，None时使用各算法默认值（gzip为6，bz2为9，xz为6，zstd为3）
+FILE_COMPRESSION_LEVEL = None
+
+# 写入文件时先写同目录临时文件再原子替换，避免崩溃或并发读取时看到不完整的文件
+FILE_ATOMIC_WRITE = True
+FILE_FSYNC = False                     # 替换前是否fsync，开启后更耐断电但写入更慢
+
+# ==================== 运行时配置 ====================
+# 缓存过期时间（秒）
+CACHE_EXPIRE_TIME = 3600
+
+# 缓存存储后端：json（每个键一个JSON文件）或 sqlite（单文件索引存储）
+CACHE_BACKEND = "json"
+
+# 缓存序列化配置：序列化器为json/pickle/msgpack/numpy/parquet/auto，压缩算法为gzip/zstd/lz4或None
+CACHE_SERIALIZER = "json"
+CACHE_COMPRESSION = None
+
+# 内存缓存层配置（均为0时不启用内存层）
+CACHE_MEMORY_MAX_ENTRIES = 0           # 内存层最大条目数
+CACHE_MEMORY_MAX_BYTES = 0             # 内存层最大字节数
+
+# 缓存容量上限配置（均为0时不限制），超出时按淘汰策略删除条目
+CACHE_MAX_ENTRIES = 0                  # 最大条目数
+CACHE_MAX_BYTES = 0                    # 最大字节数
+CACHE_EVICTION_POLICY = "lru"          # 淘汰策略：lru（最久未访问）或 lfu（访问次数最少）
+CACHE_JANITOR_INTERVAL = 0             # 后台清理线程运行间隔（秒），0表示不启动
+
+# 缓存统计配置
+CACHE_STATS_ENABLED = True             # 是否记录命中率和读写延迟
+CACHE_STATS_DUMP_INTERVAL = 0          # 定期导出统计到output/data的间隔（秒），0表示不导出
 
 
 # ==================== 工具函数 ====================
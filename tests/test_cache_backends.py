@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+缓存存储后端测试
+覆盖原子写入、分片锁、条件删除和淘汰候选的删除
+"""
+import os
+import time
+import threading
+import multiprocessing
+
+import pytest
+
+from utils.cache_backends import CacheEntry, JsonDirBackend, create_backend, hash_key
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def backend(request, tmp_path):
+    """依次创建两种存储后端"""
+    backend = create_backend(request.param, tmp_path)
+    yield backend
+    backend.close()
+
+
+def write_entries(cache_dir, rounds):
+    """子进程：反复覆盖写入同一个键"""
+    backend = JsonDirBackend(cache_dir)
+    for i in range(rounds):
+        backend.save(CacheEntry("shared", {"round": i, "payload": "x" * 4096}, time.time()))
+
+
+def test_concurrent_writes_are_atomic(tmp_path):
+    """多进程覆盖写入时读取方只会看到完整的条目，不会留下临时文件"""
+    backend = JsonDirBackend(tmp_path)
+    backend.save(CacheEntry("shared", {"round": -1, "payload": "x" * 4096}, time.time()))
+
+    processes = [multiprocessing.Process(target=write_entries, args=(tmp_path, 200)) for _ in range(2)]
+    for process in processes:
+        process.start()
+
+    errors = []
+    while any(process.is_alive() for process in processes):
+        try:
+            entry = backend.load("shared")
+            assert entry is not None and entry.data["payload"] == "x" * 4096
+        except Exception as e:
+            errors.append(e)
+    for process in processes:
+        process.join()
+
+    assert not errors
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_threaded_set_and_cleanup_keep_valid_entries(tmp_path):
+    """并发写入期间的过期清理不会删除有效条目"""
+    backend = JsonDirBackend(tmp_path)
+    for i in range(20):
+        backend.save(CacheEntry(f"k{i}", i, time.time()))
+    stop = threading.Event()
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            backend.save(CacheEntry(f"k{i % 20}", i, time.time()))
+            i += 1
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        for _ in range(50):
+            assert backend.purge_expired(time.time() - 3600) == 0
+    finally:
+        stop.set()
+        thread.join()
+    assert backend.get_stats(0)["total"] == 20
+
+
+def test_entry_locks_are_sharded(tmp_path):
+    """条目锁按哈希前缀分片，锁文件数量不随键增长"""
+    backend = JsonDirBackend(tmp_path)
+    for i in range(300):
+        backend.save(CacheEntry(f"k{i}", i, time.time()))
+    lock_names = {path.name for path in (tmp_path / ".locks").iterdir()}
+    assert lock_names == {f"{hash_key(f'k{i}')[:3]}.entry.lock" for i in range(300)}
+    assert len(lock_names) <= 4096
+
+
+def test_stale_temp_files_are_purged(tmp_path):
+    """写入中途崩溃遗留的临时文件在过期清理时删除"""
+    backend = JsonDirBackend(tmp_path)
+    stale = tmp_path / ".abc.123.tmp"
+    stale.write_text("partial")
+    os.utime(stale, (0, 0))
+    backend.purge_expired(time.time())
+    assert not stale.exists()
+
+
+def test_remove_expired_is_conditional(backend):
+    """条件删除只删除仍然过期的条目，不会误删刚写入的新值"""
+    backend.save(CacheEntry("k", 1, time.time() - 100))
+    backend.save(CacheEntry("k", 2, time.time()))
+    assert not backend.remove_expired("k", time.time() - 50)
+    assert backend.load("k").data == 2
+
+    backend.save(CacheEntry("old", 1, time.time() - 100))
+    assert backend.remove_expired("old", time.time() - 50)
+    assert backend.load("old") is None
+
+
+def test_discard_skips_rewritten_entries(backend):
+    """淘汰候选在选出后被改写时跳过，未改写的正常删除"""
+    now = time.time()
+    backend.save(CacheEntry("a", 1, now - 20))
+    backend.save(CacheEntry("b", 2, now - 10))
+    candidates = backend.eviction_candidates("lru", 2)
+    assert len(candidates) == 2
+
+    backend.save(CacheEntry("a", 3, now))
+    assert backend.discard(candidates) == 1
+    assert backend.load("a").data == 3
+    assert backend.load("b") is None
+
+
+def test_eviction_candidates_follow_policy(backend):
+    """lru按最后访问时间排序，lfu按命中次数排序"""
+    now = time.time()
+    for i, key in enumerate(["a", "b", "c"]):
+        backend.save(CacheEntry(key, i, now - 30 + i))
+    backend.record_access({"a": [now, 5], "b": [now - 5, 1]})
+
+    assert [candidate.timestamp for candidate in backend.eviction_candidates("lru", 1)] == [now - 28]
+    lfu = backend.eviction_candidates("lfu", 3)
+    assert [candidate.timestamp for candidate in lfu] == [now - 28, now - 29, now - 30]
+
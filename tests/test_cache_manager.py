@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+缓存管理器测试
+覆盖内存层、批量接口、容量淘汰和存储后端
+"""
+import json
+import time
+import base64
+
+import pytest
+
+from utils.cache_backends import CacheEntry, JsonDirBackend, hash_key
+from utils.cache_utils import CacheManager, CacheOptions
+
+
+def make_manager(cache_dir, **options):
+    """创建不启动后台线程的缓存管理器"""
+    options.setdefault("janitor_interval", 0)
+    options.setdefault("stats_dump_interval", 0)
+    return CacheManager(cache_dir, options=CacheOptions(**options))
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def backend(request):
+    """依次使用两种存储后端"""
+    return request.param
+
+
+def test_memory_tier_does_not_alias_caller_object(tmp_path, backend):
+    """写入后修改调用方的对象不影响之后读取的结果"""
+    manager = make_manager(tmp_path, backend=backend, memory_max_entries=10)
+    value = [1, 2]
+    manager.set_cache("k", value)
+    value.append(3)
+
+    assert manager.get_cache("k") == [1, 2]
+    assert manager.get_cache("k") == [1, 2]
+    assert manager.memory.get_info()["内存命中"] == 1
+
+    manager.set_many({"m": value})
+    value.append(4)
+    assert manager.get_many(["m"])[0] == {"m": [1, 2, 3]}
+
+
+def test_write_invalidates_memory_tier(tmp_path, backend):
+    """覆盖写入后不会读到内存层中的旧值"""
+    manager = make_manager(tmp_path, backend=backend, memory_max_entries=10)
+    manager.set_cache("k", 1)
+    assert manager.get_cache("k") == 1
+    manager.set_cache("k", 2)
+    assert manager.get_cache("k") == 2
+
+
+def test_binary_codec_stored_raw(tmp_path):
+    """JSON目录后端的二进制编码条目保存为.bin原始字节，不经过base64"""
+    manager = make_manager(tmp_path)
+    payload = bytes(range(256)) * 64
+    manager.set_cache("blob", payload, codec="pickle")
+    digest = hash_key("blob")
+    assert not (tmp_path / f"{digest}.json").exists()
+    # 文件大小约为原始负载加一行头部，而非base64后的4/3倍
+    assert (tmp_path / f"{digest}.bin").stat().st_size < len(payload) + 200
+    assert manager.get_cache("blob") == payload
+
+    # 改为json编码时删除旧的.bin文件
+    manager.set_cache("blob", {"a": 1})
+    assert not (tmp_path / f"{digest}.bin").exists()
+    assert manager.get_cache("blob") == {"a": 1}
+
+    # 兼容旧版本以base64内嵌在JSON中的二进制条目
+    backend = JsonDirBackend(tmp_path)
+    manager.clear_cache()
+    assert backend.load("blob") is None
+    legacy = {"data": base64.b64encode(b"raw").decode("ascii"), "timestamp": 1.0,
+              "key": "old", "codec": "pickle"}
+    (tmp_path / f"{hash_key('old')}.json").write_text(json.dumps(legacy), encoding="utf-8")
+    entry = backend.load("old")
+    assert entry == CacheEntry("old", b"raw", 1.0, entry.size, "pickle")
+
+
+def test_max_entries_evicts_least_recently_used(tmp_path, backend):
+    """超出条目上限时按LRU淘汰到上限的90%，最近访问的条目保留"""
+    manager = make_manager(tmp_path, backend=backend, max_entries=10, eviction_policy="lru")
+    for i in range(10):
+        manager.set_cache(f"k{i}", i)
+        time.sleep(0.01)
+    assert manager.get_cache("k0") == 0
+
+    manager.set_cache("k10", 10)
+    assert manager.get_cache_info()["总文件数"] == 9
+    assert manager.get_cache("k0") == 0
+    assert manager.get_many([f"k{i}" for i in (1, 2, 3)])[0] == {"k3": 3}
+    assert manager.get_stats()["operations"]["entries"]["outcomes"]["evicted"] == 2
+
+
+def test_max_entries_evicts_least_frequently_used(tmp_path, backend):
+    """LFU淘汰命中次数最少的条目"""
+    manager = make_manager(tmp_path, backend=backend, max_entries=4, eviction_policy="lfu")
+    for i in range(4):
+        manager.set_cache(f"k{i}", i)
+    for _ in range(3):
+        for key in ("k0", "k2", "k3"):
+            manager.get_cache(key)
+
+    manager.set_cache("k4", 4)
+    assert manager.get_cache("k1") is None
+    assert manager.get_cache("k0") == 0
+
+
+def test_max_bytes_bounds_total_size(tmp_path, backend):
+    """超出字节上限时淘汰到上限以下"""
+    manager = make_manager(tmp_path, backend=backend, max_bytes=20000)
+    for i in range(20):
+        manager.set_cache(f"k{i}", "x" * 2000)
+    assert manager.get_cache_info()["总大小"] <= 20000
+
+
+def test_janitor_expires_and_evicts_in_background(tmp_path, backend):
+    """后台清理线程清理过期条目并在超限时淘汰，写入线程只负责唤醒"""
+    manager = CacheManager(tmp_path, expire_time=1, options=CacheOptions(
+        backend=backend, max_entries=5, janitor_interval=0.05, stats_dump_interval=0))
+    try:
+        for i in range(8):
+            manager.set_cache(f"k{i}", i)
+
+        deadline = time.time() + 5
+        while manager.get_cache_info()["总文件数"] > 5 and time.time() < deadline:
+            time.sleep(0.05)
+        assert manager.get_cache_info()["总文件数"] <= 5
+
+        deadline = time.time() + 5
+        while manager.get_cache_info()["总文件数"] and time.time() < deadline:
+            time.sleep(0.1)
+        assert manager.get_cache_info()["总文件数"] == 0
+    finally:
+        manager.janitor.stop()
+
+
+def test_unbounded_manager_never_evicts(tmp_path):
+    """未设置上限时不记录访问也不淘汰"""
+    manager = make_manager(tmp_path)
+    for i in range(50):
+        manager.set_cache(f"k{i}", i)
+    manager.get_cache("k0")
+    assert manager.evict() == 0
+    assert manager.get_cache_info()["总文件数"] == 50
+
+
+def test_get_many_skips_corrupt_entries(tmp_path, backend):
+    """单个条目损坏时其余命中照常返回，损坏的键按未命中处理"""
+    manager = make_manager(tmp_path, backend=backend)
+    manager.set_many({"a": 1, "b": 2, "c": 3})
+    if backend == "json":
+        (tmp_path / f"{hash_key('b')}.json").write_text('{"data": ', encoding="utf-8")
+    else:
+        with manager.backend._get_connection() as conn:
+            conn.execute("UPDATE cache_entries SET payload = ? WHERE key = 'b'", (b"{",))
+
+    hits, misses = manager.get_many(["a", "b", "c", "d"], workers=2)
+    assert hits == {"a": 1, "c": 3}
+    assert misses == ["b", "d"]
+    outcomes = manager.get_stats()["operations"]["get"]["outcomes"]
+    assert outcomes["error"] == 1 and outcomes["miss"] == 1
+
+
+def test_get_many_skips_undecodable_entries(tmp_path, backend):
+    """负载无法解码的条目不影响同一批次的其他键"""
+    manager = make_manager(tmp_path, backend=backend)
+    manager.set_many({"a": 1, "b": 2}, codec="pickle")
+    entry = manager.backend.load("b")
+    entry.data = b"not a pickle"
+    manager.backend.save(entry)
+
+    assert manager.get_many(["a", "b"]) == ({"a": 1}, ["b"])
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+缓存装饰器测试
+覆盖递归/嵌套调用的锁、结果类型保持和不可哈希参数
+"""
+import sys
+import time
+import asyncio
+import threading
+import multiprocessing
+
+import pandas as pd
+import pytest
+
+from utils.cache_backends import RangeLock, _thread_locks
+from utils.cache_utils import CacheManager, CacheOptions, cached, make_cache_key
+
+
+@pytest.fixture
+def manager(tmp_path):
+    """使用临时目录的缓存管理器"""
+    return CacheManager(tmp_path / "cache", options=CacheOptions(janitor_interval=0, stats_dump_interval=0))
+
+
+def run_with_timeout(target, timeout=30):
+    """在线程中运行，超时视为死锁"""
+    result = {}
+    thread = threading.Thread(target=lambda: result.setdefault("value", target()), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "调用超时，可能发生死锁"
+    return result["value"]
+
+
+def test_recursive_call_does_not_deadlock(manager):
+    """递归的被缓存函数不会因锁冲突而挂起"""
+    @cached(manager=manager)
+    def fib(n):
+        return n if n < 2 else fib(n - 1) + fib(n - 2)
+
+    # 每层递归经过装饰器的多层调用，需要放宽递归深度
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(10000)
+    try:
+        assert run_with_timeout(lambda: fib(300)) == 222232244629420445529739893461909967206666939096499764990979600
+    finally:
+        sys.setrecursionlimit(limit)
+
+
+def test_nested_calls_do_not_deadlock(manager):
+    """被缓存函数调用其他被缓存函数时不会挂起"""
+    @cached(manager=manager)
+    def inner(n):
+        return n * 2
+
+    @cached(manager=manager)
+    def outer(n):
+        return sum(inner(i) for i in range(n))
+
+    assert run_with_timeout(lambda: outer(200)) == 2 * sum(range(200))
+
+
+def test_async_recursive_call_does_not_deadlock(manager):
+    """递归的被缓存协程不会挂起"""
+    @cached(manager=manager)
+    async def afib(n):
+        return n if n < 2 else await afib(n - 1) + await afib(n - 2)
+
+    assert run_with_timeout(lambda: asyncio.run(afib(60))) == 1548008755920
+
+
+def test_locks_of_different_keys_are_independent(manager):
+    """不同键的锁互不影响，释放后注册表被回收"""
+    first = manager.lock("a")
+    second = manager.lock("b")
+    with first:
+        with second:
+            assert first.offset != second.offset
+    assert not _thread_locks
+
+
+def test_lock_files_do_not_grow_with_keys(tmp_path):
+    """无论缓存多少个键，锁目录中只有固定的锁文件"""
+    for backend in ("json", "sqlite"):
+        manager = CacheManager(tmp_path / backend, options=CacheOptions(
+            backend=backend, janitor_interval=0, stats_dump_interval=0))
+
+        @cached(manager=manager)
+        def square(n):
+            return n * n
+
+        for n in range(50):
+            square(n)
+        assert [path.name for path in (tmp_path / backend / ".locks").iterdir()
+                if not path.name.endswith(".entry.lock")] == ["keys.lock"]
+
+
+def hold_lock(path, name, events):
+    """子进程：获取锁后通知父进程，等待指示后释放"""
+    acquired, release = events
+    with RangeLock(path, name):
+        acquired.set()
+        release.wait(10)
+
+
+def test_range_lock_excludes_other_processes(tmp_path):
+    """同一个键的锁跨进程互斥，不同键的锁互不阻塞"""
+    path = tmp_path / "keys.lock"
+    events = (multiprocessing.Event(), multiprocessing.Event())
+    process = multiprocessing.Process(target=hold_lock, args=(path, "a", events))
+    process.start()
+    try:
+        assert events[0].wait(10)
+        with RangeLock(path, "b"):
+            pass
+
+        def acquire_and_release():
+            with RangeLock(path, "a"):
+                pass
+
+        waiter = threading.Thread(target=acquire_and_release, daemon=True)
+        waiter.start()
+        time.sleep(0.3)
+        assert waiter.is_alive()
+
+        events[1].set()
+        waiter.join(10)
+        assert not waiter.is_alive()
+    finally:
+        events[1].set()
+        process.join(10)
+
+
+def test_result_types_are_preserved(manager):
+    """DataFrame和元组结果经缓存后类型不变"""
+    calls = []
+
+    @cached(manager=manager)
+    def load(n):
+        calls.append(n)
+        return pd.DataFrame({"a": range(n)}), (1, 2)
+
+    first = load(3)
+    manager.memory.clear()
+    second = load(3)
+
+    assert calls == [3]
+    assert isinstance(second, tuple)
+    assert isinstance(second[1], tuple)
+    pd.testing.assert_frame_equal(first[0], second[0])
+
+
+def test_unhashable_dataframe_argument():
+    """含列表单元格的DataFrame/Series参数也能生成稳定的键"""
+    def func(df):
+        return df
+
+    df = pd.DataFrame({"tags": [[1, 2], [3]]})
+    assert make_cache_key(func, ((df,), {})) == make_cache_key(func, ((df.copy(),), {}))
+    assert make_cache_key(func, ((df["tags"],), {})) == make_cache_key(func, ((df["tags"].copy(),), {}))
+    assert make_cache_key(func, ((df,), {})) != make_cache_key(func, ((pd.DataFrame({"tags": [[1], [3]]}),), {}))
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+数据工具测试
+覆盖合并、复合查询、并行分块执行和索引
+"""
+import sys
+import subprocess
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.data_utils import (
+    IndexedDataset, MergeOptions, ParallelOptions, Query, compile_query, filter_data, merge_data,
+    parallel_map_chunks, query_data
+)
+
+LEFT = [{"id": 1, "a": "x"}, {"id": 2, "a": "y"}]
+RIGHT = [{"id": 1, "b": "B1"}, {"id": 3, "b": "B3"}]
+EXPECTED = [{"id": 1, "a": "x", "b": "B1"}, {"id": 2, "a": "y"}]
+
+
+@pytest.mark.parametrize("right", [
+    RIGHT,
+    pd.DataFrame(RIGHT),
+    {"id": np.array([1, 3]), "b": np.array(["B1", "B3"])},
+    IndexedDataset(RIGHT),
+])
+def test_merge_data_accepts_mixed_types(right):
+    """右表为任意数据集类型时，字典列表左表的结果相同"""
+    assert merge_data(LEFT, right, "id") == EXPECTED
+
+
+@pytest.mark.parametrize("right", [RIGHT, pd.DataFrame(RIGHT), IndexedDataset(RIGHT)])
+def test_merge_data_returns_left_type(right):
+    """左表为DataFrame或列式字典时返回相同类型"""
+    merged = merge_data(pd.DataFrame(LEFT), right, "id")
+    assert isinstance(merged, pd.DataFrame)
+    assert merged["b"].tolist()[0] == "B1" and pd.isna(merged["b"].tolist()[1])
+
+    columns = {"id": np.array([1, 2]), "a": np.array(["x", "y"])}
+    merged = merge_data(columns, right, "id")
+    assert isinstance(merged, dict) and merged["b"][0] == "B1"
+
+
+USERS = [{"uid": 1, "n": "a"}, {"uid": 2, "n": "b"}, {"uid": 3, "n": "c"}]
+ORDERS = [{"oid": 10, "uid": 1}, {"oid": 11, "uid": 1}, {"oid": 12, "uid": 2}, {"oid": 13, "uid": 9}]
+JOINS = {
+    ("left", False): [(1, 11), (2, 12), (3, None)],
+    ("left", True): [(1, 10), (1, 11), (2, 12), (3, None)],
+    ("inner", False): [(1, 11), (2, 12)],
+    ("inner", True): [(1, 10), (1, 11), (2, 12)],
+    ("outer", False): [(1, 11), (2, 12), (3, None), (9, 13)],
+    ("outer", True): [(1, 10), (1, 11), (2, 12), (3, None), (9, 13)],
+}
+
+
+def join_pairs(result):
+    """取出连接结果的(uid, oid)列表，缺失值记为None"""
+    if isinstance(result, pd.DataFrame):
+        result = result.to_dict("records")
+    return [(int(row["uid"]), None if pd.isna(row.get("oid")) else int(row["oid"])) for row in result]
+
+
+@pytest.mark.parametrize("how, one_to_many", list(JOINS))
+def test_merge_data_join_options(how, one_to_many):
+    """各种连接方式在字典列表、索引数据集和DataFrame之间结果一致"""
+    options = MergeOptions("uid", how=how, one_to_many=one_to_many)
+    expected = JOINS[(how, one_to_many)]
+    assert join_pairs(merge_data(USERS, ORDERS, options)) == expected
+    assert join_pairs(merge_data(USERS, IndexedDataset(ORDERS), options)) == expected
+    assert join_pairs(merge_data(IndexedDataset(USERS), ORDERS, options)) == expected
+    assert join_pairs(merge_data(pd.DataFrame(USERS), pd.DataFrame(ORDERS), options)) == expected
+
+
+def test_merge_data_rejects_unknown_join():
+    """不支持的连接方式报错"""
+    with pytest.raises(ValueError):
+        merge_data(USERS, ORDERS, MergeOptions("uid", how="cross"))
+
+
+def test_index_lookup_skips_unhashable_values():
+    """in查询的取值中含不可哈希值时跳过，与字典列表路径一致"""
+    rows = [{"v": "b"}, {"v": "a"}]
+    values = [["a"], "b"]
+    assert filter_data(IndexedDataset(rows, ["v"]), "v", values, "in") == [{"v": "b"}]
+    assert filter_data(rows, "v", values, "in") == [{"v": "b"}]
+
+
+# ==================== 复合查询 ====================
+ROWS = [
+    {"id": 0, "age": 17, "city": "北京", "email": "a@x.com"},
+    {"id": 1, "age": 18, "city": "上海", "email": None},
+    {"id": 2, "age": 25, "city": "广州"},
+    {"id": 3, "age": None, "city": "北京", "email": "d@x.com"},
+    {"id": 4, "age": 30, "email": "e@x.com"},
+    {"id": 5, "age": 45, "city": "深圳", "email": "f@x.com"},
+    {"id": 6, "age": 29, "city": None, "email": ""},
+    {"id": 7, "age": float("nan"), "city": "深圳", "email": float("nan")},
+]
+
+QUERIES = {
+    "age > 20": [2, 4, 5, 6],
+    "age != 25": [0, 1, 4, 5, 6],
+    "18 <= age < 30": [1, 2, 6],
+    "30 >= age > 17": [1, 2, 4, 6],
+    "city in ('北京', '上海')": [0, 1, 3],
+    "city not in ['北京', '上海']": [2, 5, 7],
+    "email is None": [1, 2, 7],
+    "email is not None": [0, 3, 4, 5, 6],
+    "city == None": [4, 6],
+    "age > 20 and city in ('广州', '深圳')": [2, 5],
+    "age < 18 or city == '深圳'": [0, 5, 7],
+    "not (age > 20)": [0, 1, 3, 7],
+    "not city == '北京' and age is not None": [1, 2, 4, 5, 6],
+    "missing == 1": [],
+    "missing is None": [0, 1, 2, 3, 4, 5, 6, 7],
+    "(age >= 25 or email is None) and not city is None": [1, 2, 5, 7],
+}
+
+
+def query_ids(result):
+    """取出查询结果的id列表"""
+    if isinstance(result, pd.DataFrame):
+        return result["id"].tolist()
+    if isinstance(result, dict):
+        return result["id"].tolist()
+    return [row["id"] for row in result]
+
+
+@pytest.mark.parametrize("expression, expected", list(QUERIES.items()))
+def test_query_rows_and_frames_agree(expression, expected):
+    """字典行、DataFrame和列式字典的查询结果一致"""
+    frame = pd.DataFrame(ROWS)
+    columns = {name: frame[name].to_numpy() for name in frame.columns}
+
+    assert query_ids(query_data(ROWS, expression)) == expected
+    assert query_ids(query_data(iter(ROWS), expression)) == expected
+    assert query_ids(query_data(frame, expression)) == expected
+    assert query_ids(query_data(columns, expression)) == expected
+    assert query_ids(filter_data(ROWS, compile_query(expression))) == expected
+
+
+@pytest.mark.parametrize("limit", [0, 1, 2, 10])
+def test_query_limit(limit):
+    """limit截断结果，各种输入类型一致"""
+    expected = QUERIES["age > 20"][:limit]
+    assert query_ids(query_data(ROWS, "age > 20", limit=limit)) == expected
+    assert query_ids(query_data(pd.DataFrame(ROWS), "age > 20", limit=limit)) == expected
+
+
+def test_query_limit_stops_iteration_early():
+    """字典行达到limit后不再读取后续行"""
+    consumed = []
+
+    def rows():
+        for row in ROWS:
+            consumed.append(row["id"])
+            yield row
+
+    assert query_ids(query_data(rows(), "age > 20", limit=1)) == [2]
+    assert consumed == [0, 1, 2]
+
+
+@pytest.mark.parametrize("expression", [
+    "__import__('os').system('echo hi')",
+    "age == __import__('os')",
+    "age.real > 1",
+    "row.__class__ is None",
+    "len(city) > 1",
+    "age > (lambda: 1)()",
+    "city == f'{age}'",
+    "age +",
+])
+def test_query_rejects_non_literal_nodes(expression):
+    """函数调用、属性访问等非字面量语法在编译时报错"""
+    with pytest.raises(ValueError):
+        Query(expression)
+
+
+# ==================== 并行分块执行 ====================
+NESTED_SCRIPT = """
+import functools
+from utils.data_utils import ParallelOptions, count_by_field, parallel_map_chunks
+data = [{"a": i % 3} for i in range(2000)]
+result = parallel_map_chunks(functools.partial(count_by_field, field="a", workers=2), data,
+                             ParallelOptions(workers=2, chunk_size=500))
+print(sum(counts[0] for counts in result))
+"""
+
+
+def test_nested_parallel_calls_do_not_deadlock():
+    """块函数内部再并行执行时直接在工作进程中串行运行，不会死锁"""
+    root = Path(__file__).resolve().parents[1]
+    completed = subprocess.run([sys.executable, "-c", NESTED_SCRIPT], cwd=root,
+                               capture_output=True, text=True, timeout=120)
+    assert completed.returncode == 0, completed.stderr
+    assert completed.stdout.strip() == "667"
+
+
+def test_parallel_map_chunks_keeps_order():
+    """结果按块顺序返回，与串行执行一致"""
+    data = list(range(1000))
+    expected = [sum(data[i:i + 100]) for i in range(0, 1000, 100)]
+    assert parallel_map_chunks(sum, data, ParallelOptions(workers=2, chunk_size=100)) == expected
+    assert parallel_map_chunks(sum, data, ParallelOptions(workers=1, chunk_size=100)) == expected
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+文件工具测试
+覆盖内存映射搜索、压缩读写和批量加载
+"""
+import pytest
+
+from utils import file_utils
+from utils.file_utils import (
+    append_jsonl, detect_compression, grep_file, iter_jsonl, load_many, open_file,
+    read_csv, read_json, read_text, write_csv, write_json, write_jsonl, write_text
+)
+
+COMPRESSIONS = [("", None), (".gz", "gzip"), (".bz2", "bz2"), (".xz", "xz"), (".zst", "zstd")]
+
+
+def test_grep_file_anchors_match_each_line(tmp_path):
+    """^和$按行匹配，每个匹配行只返回一次"""
+    path = tmp_path / "a.log"
+    path.write_bytes(b"foo\nbar\nfoo2\nxfoo\n")
+    assert list(grep_file(path, "^foo")) == [(0, b"foo"), (8, b"foo2")]
+    assert list(grep_file(path, "o$")) == [(0, b"foo"), (13, b"xfoo")]
+    assert list(grep_file(path, "o")) == [(0, b"foo"), (8, b"foo2"), (13, b"xfoo")]
+
+
+def test_load_many_resolves_plain_paths_like_globs(tmp_path, monkeypatch):
+    """单个路径与glob模式一样基于DATA_DIR解析，并检查文件格式"""
+    monkeypatch.setattr(file_utils, "DATA_DIR", tmp_path)
+    monkeypatch.chdir(tmp_path.parent)
+    (tmp_path / "a.csv").write_text("x\n1\n", encoding="utf-8")
+    (tmp_path / "notes.log").write_text("x", encoding="utf-8")
+
+    assert [path for path, _ in load_many("a.csv")] == [tmp_path / "a.csv"]
+    assert [path for path, _ in load_many("a*.csv")] == [tmp_path / "a.csv"]
+    assert load_many("a.csv")[0][1] == load_many("a*.csv")[0][1]
+    with pytest.raises(ValueError):
+        load_many("notes.log")
+
+
+@pytest.mark.parametrize("suffix, compression", COMPRESSIONS)
+def test_compressed_round_trip(tmp_path, suffix, compression):
+    """各种压缩格式按扩展名写入，按文件头读取"""
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    records = [{"id": i, "名称": f"条目{i}"} for i in range(100)]
+
+    write_jsonl(records, tmp_path / f"a.jsonl{suffix}")
+    append_jsonl([{"id": 100}], tmp_path / f"a.jsonl{suffix}")
+    assert list(iter_jsonl(tmp_path / f"a.jsonl{suffix}")) == records + [{"id": 100}]
+
+    write_csv([{k: str(v) for k, v in record.items()} for record in records], tmp_path / f"a.csv{suffix}")
+    assert read_csv(tmp_path / f"a.csv{suffix}")[5] == {"id": "5", "名称": "条目5"}
+
+    write_json({"records": records}, tmp_path / f"a.json{suffix}")
+    assert read_json(tmp_path / f"a.json{suffix}") == {"records": records}
+
+    write_text("你好\n", tmp_path / f"a.txt{suffix}")
+    assert read_text(tmp_path / f"a.txt{suffix}") == "你好\n"
+    assert detect_compression(tmp_path / f"a.txt{suffix}") == compression
+
+
+def test_detection_uses_magic_bytes_not_extension(tmp_path):
+    """读取时按文件头识别压缩格式，与扩展名无关"""
+    write_text("hello", tmp_path / "a.txt.gz")
+    (tmp_path / "a.txt.gz").rename(tmp_path / "renamed.txt")
+    assert read_text(tmp_path / "renamed.txt") == "hello"
+
+    # 以"BZh"开头的普通文本不会被误判为bz2
+    (tmp_path / "b.csv").write_text("BZh_code,x\n1,2\n", encoding="utf-8")
+    assert detect_compression(tmp_path / "b.csv") is None
+    assert read_csv(tmp_path / "b.csv") == [{"BZh_code": "1", "x": "2"}]
+
+
+def test_compression_level_is_applied(tmp_path):
+    """压缩级别影响输出大小"""
+    data = "".join(f"{i % 97},{i * 7 % 13}\n" for i in range(20000)).encode()
+    sizes = []
+    for level in (1, 9):
+        with open_file(tmp_path / f"l{level}.gz", "wb", level=level) as f:
+            f.write(data)
+        sizes.append((tmp_path / f"l{level}.gz").stat().st_size)
+    assert sizes[1] < sizes[0]
@@ -0,0 +1,798 @@
+# -*- coding: utf-8 -*-
+"""
+缓存存储后端模块
+提供可插拔的缓存存储实现：每个键一个JSON文件的目录后端，以及单文件索引的SQLite后端
+"""
+
+import os
+import json
+import heapq
+import base64
+import sqlite3
+import time
+import tempfile
+import hashlib
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from utils.file_utils import ScanOptions, scan_files
+
+# 跨进程文件锁：POSIX使用fcntl.flock，Windows使用msvcrt.locking
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+@dataclass
+class CacheEntry:
+    """缓存条目
+    
+    codec为"json"时data为原始数据并以JSON内嵌存储；否则data为已编码的字节内容，
+    codec记录了序列化器和压缩算法，读取时据此选择解码方式。
+    """
+    key: str
+    data: Any
+    timestamp: float
+    size: int = 0
+    codec: str = "json"
+
+# load_many内部表示条目不存在的标记
+_MISSING = object()
+
+# 淘汰候选条目：ident为后端内部标识（文件路径或键），timestamp用于删除前确认条目未被改写
+EvictionCandidate = namedtuple("EvictionCandidate", ["ident", "timestamp", "size"])
+
+def map_with_workers(func: Callable, items: List[Any], workers: int = 0) -> List[Any]:
+    """对列表逐项调用func，workers大于1时使用线程池并发执行，结果保持输入顺序"""
+    if workers > 1 and len(items) > 1:
+        with ThreadPoolExecutor(max_workers=min(workers, len(items))) as executor:
+            return list(executor.map(func, items))
+    return [func(item) for item in items]
+
+def hash_key(key: str) -> str:
+    """生成缓存键的哈希值"""
+    # 使用MD5哈希确保文件名安全
+    return hashlib.md5(key.encode('utf-8')).hexdigest()
+
+# 锁名称 -> [进程内线程锁, 引用计数]，无人使用时回收
+_thread_locks: Dict[str, list] = {}
+_thread_locks_guard = threading.Lock()
+
+def _acquire_thread_lock(name: str) -> None:
+    """获取名称对应的进程内线程锁"""
+    with _thread_locks_guard:
+        item = _thread_locks.setdefault(name, [threading.Lock(), 0])
+        item[1] += 1
+    item[0].acquire()
+
+def _release_thread_lock(name: str) -> None:
+    """释放名称对应的进程内线程锁，引用计数归零时从注册表移除"""
+    with _thread_locks_guard:
+        item = _thread_locks[name]
+        item[1] -= 1
+        if item[1] == 0:
+            del _thread_locks[name]
+    item[0].release()
+
+class FileLock:
+    """跨进程文件锁
+    
+    同一进程内的线程先竞争路径对应的线程锁，再由持有者对锁文件加排他锁，
+    因此同时适用于线程间和进程间互斥。锁不可重入。
+    """
+    
+    def __init__(self, path: Path):
+        """初始化文件锁"""
+        self.path = Path(path)
+        self._fd = None
+    
+    def _acquire_thread_lock(self) -> None:
+        """获取路径对应的线程锁"""
+        _acquire_thread_lock(str(self.path))
+    
+    def _release_thread_lock(self) -> None:
+        """释放路径对应的线程锁"""
+        _release_thread_lock(str(self.path))
+    
+    def acquire(self) -> None:
+        """获取锁，阻塞直到成功"""
+        self._acquire_thread_lock()
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(str(self.path), os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                else:
+                    # msvcrt.LK_LOCK重试约10秒后抛出异常，需循环等待
+                    while True:
+                        try:
+                            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                            break
+                        except OSError:
+                            continue
+            except BaseException:
+                os.close(fd)
+                raise
+            self._fd = fd
+        except BaseException:
+            self._release_thread_lock()
+            raise
+    
+    def release(self) -> None:
+        """释放锁"""
+        fd, self._fd = self._fd, None
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
+            self._release_thread_lock()
+    
+    def __enter__(self) -> "FileLock":
+        """进入上下文时获取锁"""
+        self.acquire()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        """退出上下文时释放锁"""
+        self.release()
+
+class RangeLock:
+    """跨进程字节范围锁
+    
+    多个名称共用一个锁文件，各自锁定文件中不同偏移处的1个字节（fcntl.lockf/msvcrt.locking），
+    锁文件不写入内容，数量也不随名称增长。同一进程内的线程先竞争名称对应的线程锁。锁不可重入。
+    
+    POSIX记录锁属于进程而非文件描述符，关闭同一文件的任一描述符会释放本进程在该文件上的所有锁，
+    因此每个锁文件在进程内只打开一次并保持打开。
+    """
+    
+    # 锁文件路径 -> 进程内共享的文件描述符
+    _fds: Dict[str, int] = {}
+    _fds_lock = threading.Lock()
+    
+    def __init__(self, path: Path, name: str):
+        """初始化范围锁，name的哈希决定锁定的偏移"""
+        self.path = Path(path)
+        self.name = name
+        digest = hashlib.md5(name.encode('utf-8')).hexdigest()
+        # POSIX使用60位偏移，不同名称几乎不会冲突；msvcrt的偏移限制在31位以内
+        self.offset = int(digest[:15], 16) if fcntl is not None else int(digest[:8], 16) & 0x7fffffff
+    
+    def _get_fd(self) -> int:
+        """获取锁文件在本进程内共享的描述符"""
+        with RangeLock._fds_lock:
+            fd = RangeLock._fds.get(str(self.path))
+            if fd is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                fd = os.open(str(self.path), os.O_RDWR | os.O_CREAT, 0o644)
+                RangeLock._fds[str(self.path)] = fd
+            return fd
+    
+    def acquire(self) -> None:
+        """获取锁，阻塞直到成功"""
+        _acquire_thread_lock(f"{self.path}:{self.name}")
+        try:
+            fd = self._get_fd()
+            if fcntl is not None:
+                fcntl.lockf(fd, fcntl.LOCK_EX, 1, self.offset)
+                return
+            
+            # msvcrt按当前文件位置加锁，描述符在线程间共享，定位和加锁需一起完成
+            while True:
+                with RangeLock._fds_lock:
+                    os.lseek(fd, self.offset, os.SEEK_SET)
+                    try:
+                        msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                        return
+                    except OSError:
+                        pass
+                time.sleep(0.01)
+        except BaseException:
+            _release_thread_lock(f"{self.path}:{self.name}")
+            raise
+    
+    def release(self) -> None:
+        """释放锁"""
+        try:
+            fd = self._get_fd()
+            if fcntl is not None:
+                fcntl.lockf(fd, fcntl.LOCK_UN, 1, self.offset)
+            else:
+                with RangeLock._fds_lock:
+                    os.lseek(fd, self.offset, os.SEEK_SET)
+                    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            _release_thread_lock(f"{self.path}:{self.name}")
+    
+    def __enter__(self) -> "RangeLock":
+        """进入上下文时获取锁"""
+        self.acquire()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        """退出上下文时释放锁"""
+        self.release()
+
+class CacheBackend:
+    """缓存存储后端基类
+    
+    deadline参数为过期分界时间戳：timestamp早于deadline的条目视为过期。
+    """
+    
+    name = "base"
+    
+    def load(self, key: str) -> Optional[CacheEntry]:
+        """读取条目，不存在时返回None"""
+        raise NotImplementedError
+    
+    def save(self, entry: CacheEntry) -> int:
+        """写入条目，返回写入的字节数"""
+        raise NotImplementedError
+    
+    def remove(self, key: str) -> None:
+        """删除条目"""
+        raise NotImplementedError
+    
+    def clear(self) -> None:
+        """清空所有条目"""
+        raise NotImplementedError
+    
+    def load_many(self, keys: List[str], workers: int = 0) -> Dict[str, Optional[CacheEntry]]:
+        """批量读取条目，返回存在的 键 -> 条目
+        
+        单个条目损坏或读取出错时该键对应None，不影响其他键的结果。
+        """
+        entries = map_with_workers(self._load_or_error, keys, workers)
+        return {key: entry for key, entry in zip(keys, entries) if entry is not _MISSING}
+    
+    def _load_or_error(self, key: str) -> Any:
+        """读取单个条目，不存在返回_MISSING，读取出错返回None"""
+        try:
+            entry = self.load(key)
+        except Exception as e:
+            print(f"读取缓存条目失败: {key}: {e}")
+            return None
+        return _MISSING if entry is None else entry
+    
+    def save_many(self, entries: List[CacheEntry], workers: int = 0) -> List[int]:
+        """批量写入条目，返回与输入顺序一致的写入字节数"""
+        return map_with_workers(self.save, entries, workers)
+    
+    def remove_many(self, keys: List[str], workers: int = 0) -> None:
+        """批量删除条目"""
+        map_with_workers(self.remove, keys, workers)
+    
+    def remove_expired(self, key: str, deadline: float) -> bool:
+        """仅当条目仍然过期时删除，避免误删其他进程刚写入的新值"""
+        entry = self.load(key)
+        if entry is not None and entry.timestamp < deadline:
+            self.remove(key)
+            return True
+        return False
+    
+    def get_stats(self, deadline: float) -> Dict[str, int]:
+        """统计条目数量和大小，返回total/valid/expired/size"""
+        raise NotImplementedError
+    
+    def purge_expired(self, deadline: float) -> int:
+        """删除过期条目，返回删除的数量"""
+        raise NotImplementedError
+    
+    def record_access(self, accesses: Dict[str, List[float]]) -> None:
+        """批量记录访问信息，accesses为 键 -> [最后访问时间, 命中次数]"""
+        pass
+    
+    def eviction_candidates(self, policy: str, limit: int) -> List[EvictionCandidate]:
+        """按淘汰策略（lru/lfu）返回最应淘汰的limit个条目，顺序即淘汰顺序"""
+        raise NotImplementedError
+    
+    def discard(self, candidates: List[EvictionCandidate]) -> int:
+        """删除淘汰候选条目（已被改写的条目跳过），返回删除的数量"""
+        raise NotImplementedError
+    
+    def close(self) -> None:
+        """释放后端占用的资源"""
+        pass
+
+class JsonDirBackend(CacheBackend):
+    """JSON目录后端，每个键保存为缓存目录下的一个条目文件
+    
+    json编码的条目保存为<md5>.json文件；其他（二进制）编码的条目保存为<md5>.bin文件，
+    内容为一行JSON头（key/timestamp/codec）加原始字节，不经过base64和JSON解析。
+    
+    条目的时间戳同时记录在文件mtime中，get_stats和purge_expired只读取目录元数据，
+    耗时与条目数量成正比，与缓存数据的总字节数无关。
+    
+    写入先落到同目录的临时文件再os.replace替换，读取方不会看到半写的文件，读取无需加锁。
+    替换和条件删除在按哈希前缀分片的跨进程锁内完成，保证"检查后删除"不会误删新写入的条目。
+    
+    最后访问时间记录在文件atime中；命中次数只在本进程内统计，LFU淘汰以本进程的计数为准。
+    """
+    
+    name = "json"
+    
+    # 条目文件扩展名：json编码为.json，其他编码为.bin
+    SUFFIXES = (".json", ".bin")
+    
+    def __init__(self, cache_dir: Path, indent: Optional[int] = 2):
+        """初始化JSON目录后端，indent为None时写入紧凑JSON"""
+        self.cache_dir = Path(cache_dir)
+        self.indent = indent
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # 文件名哈希 -> 本进程内的命中次数
+        self._hits: Dict[str, int] = {}
+    
+    def _get_cache_path(self, key: str, codec: str = "json") -> Path:
+        """获取缓存文件路径"""
+        return self.cache_dir / f"{hash_key(key)}{'.json' if codec == 'json' else '.bin'}"
+    
+    def _entry_paths(self, digest: str) -> List[Path]:
+        """条目哈希对应的所有可能的文件路径"""
+        return [self.cache_dir / f"{digest}{suffix}" for suffix in self.SUFFIXES]
+    
+    def _entry_lock(self, digest: str) -> FileLock:
+        """获取条目哈希对应的分片锁，仅在短暂的替换/删除操作期间持有"""
+        return FileLock(self.cache_dir / ".locks" / f"{digest[:3]}.entry.lock")
+    
+    def load(self, key: str) -> Optional[CacheEntry]:
+        """读取条目"""
+        for cache_path in self._entry_paths(hash_key(key)):
+            try:
+                with open(cache_path, 'rb') as f:
+                    content = f.read()
+            except FileNotFoundError:
+                continue
+            
+            if cache_path.suffix == ".bin":
+                header, _, payload = content.partition(b"\n")
+                meta = json.loads(header.decode('utf-8'))
+                return CacheEntry(key, payload, meta["timestamp"], len(content), meta["codec"])
+            
+            # 旧版本写入的文件没有codec字段，均为内嵌JSON；二进制编码曾以base64内嵌在JSON中
+            cache_data = json.loads(content.decode('utf-8'))
+            codec = cache_data.get("codec", "json")
+            data = cache_data["data"]
+            if codec != "json":
+                data = base64.b64decode(data)
+            return CacheEntry(key, data, cache_data["timestamp"], len(content), codec)
+        return None
+    
+    def save(self, entry: CacheEntry) -> int:
+        """写入条目"""
+        if entry.codec == "json":
+            cache_data = {
+                "data": entry.data,
+                "timestamp": entry.timestamp,
+                "key": entry.key,
+                "codec": entry.codec
+            }
+            content = json.dumps(cache_data, ensure_ascii=False, indent=self.indent).encode('utf-8')
+        else:
+            # 二进制编码：单行JSON头后直接拼接原始字节
+            header = {"timestamp": entry.timestamp, "key": entry.key, "codec": entry.codec}
+            content = json.dumps(header, ensure_ascii=False).encode('utf-8') + b"\n" + entry.data
+        
+        digest = hash_key(entry.key)
+        cache_path = self._get_cache_path(entry.key, entry.codec)
+        fd, temp_path = tempfile.mkstemp(dir=str(self.cache_dir), prefix=f".{digest}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            
+            # 将条目时间戳写入文件mtime，统计和过期清理只需读取文件元数据
+            os.utime(temp_path, (entry.timestamp, entry.timestamp))
+            
+            with self._entry_lock(digest):
+                # 编码改变时先删除另一种格式的旧文件，读取方最多短暂未命中而不会读到旧值
+                for stale_path in self._entry_paths(digest):
+                    if stale_path != cache_path:
+                        try:
+                            stale_path.unlink()
+                        except FileNotFoundError:
+                            pass
+                os.replace(temp_path, cache_path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        
+        return len(content)
+    
+    def remove(self, key: str) -> None:
+        """删除条目"""
+        digest = hash_key(key)
+        self._hits.pop(digest, None)
+        for cache_path in self._entry_paths(digest):
+            try:
+                cache_path.unlink()
+            except FileNotFoundError:
+                pass
+    
+    def remove_expired(self, key: str, deadline: float) -> bool:
+        """仅当条目文件仍然过期时删除"""
+        digest = hash_key(key)
+        with self._entry_lock(digest):
+            removed = [self._unlink_if_expired(str(path), deadline) for path in self._entry_paths(digest)]
+        return any(removed)
+    
+    def _unlink_if_expired(self, path: str, deadline: float) -> bool:
+        """重新检查文件mtime后删除过期文件（调用方需持有分片锁）"""
+        try:
+            if os.stat(path).st_mtime >= deadline:
+                return False
+            os.unlink(path)
+            return True
+        except FileNotFoundError:
+            return False
+    
+    def clear(self) -> None:
+        """清空所有条目"""
+        self._hits.clear()
+        for record in scan_files(self.cache_dir, ScanOptions(patterns=["*" + suffix for suffix in self.SUFFIXES], recursive=False)):
+            try:
+                os.unlink(record.path)
+            except FileNotFoundError:
+                pass
+    
+    def _scan_stat(self) -> Iterator[Tuple[str, os.stat_result]]:
+        """遍历缓存文件，返回(路径, stat信息)，不解析文件内容"""
+        with os.scandir(self.cache_dir) as it:
+            for dir_entry in it:
+                if not dir_entry.name.endswith(self.SUFFIXES) or not dir_entry.is_file():
+                    continue
+                try:
+                    stat = dir_entry.stat()
+                except FileNotFoundError:
+                    # 遍历期间被其他调用删除
+                    continue
+                yield dir_entry.path, stat
+    
+    def _scan_meta(self) -> Iterator[Tuple[str, float, int]]:
+        """遍历缓存文件元数据，返回(路径, 时间戳, 大小)，只读取stat信息不解析内容"""
+        for path, stat in self._scan_stat():
+            yield path, stat.st_mtime, stat.st_size
+    
+    def get_stats(self, deadline: float) -> Dict[str, int]:
+        """统计条目数量和大小（基于文件mtime，无需读取文件内容）"""
+        total_count = 0
+        expired_count = 0
+        total_size = 0
+        
+        for _, timestamp, size in self._scan_meta():
+            total_count += 1
+            total_size += size
+            if timestamp < deadline:
+                expired_count += 1
+        
+        return {
+            "total": total_count,
+            "valid": total_count - expired_count,
+            "expired": expired_count,
+            "size": total_size
+        }
+    
+    def purge_expired(self, deadline: float) -> int:
+        """删除过期条目（基于文件mtime，无需读取文件内容）"""
+        # 按分片锁分组，每个分片只加锁一次
+        candidates = {}
+        for path, timestamp, _ in self._scan_meta():
+            if timestamp < deadline:
+                digest = os.path.basename(path)
+                candidates.setdefault(digest[:3], []).append(path)
+        
+        cleaned_count = 0
+        for prefix, paths in candidates.items():
+            with self._entry_lock(prefix):
+                for path in paths:
+                    if self._unlink_if_expired(path, deadline):
+                        cleaned_count += 1
+        
+        self._purge_temp_files(deadline)
+        
+        return cleaned_count
+    
+    def record_access(self, accesses: Dict[str, List[float]]) -> None:
+        """将最后访问时间写入文件atime（保留mtime中的时间戳），并累计命中次数"""
+        groups = {}
+        for key, (access_time, hits) in accesses.items():
+            digest = hash_key(key)
+            self._hits[digest] = self._hits.get(digest, 0) + hits
+            groups.setdefault(digest[:3], []).append((digest, access_time))
+        
+        for prefix, items in groups.items():
+            with self._entry_lock(prefix):
+                for digest, access_time in items:
+                    for path in self._entry_paths(digest):
+                        try:
+                            mtime_ns = os.stat(path).st_mtime_ns
+                            os.utime(path, ns=(int(access_time * 1e9), mtime_ns))
+                        except FileNotFoundError:
+                            pass
+    
+    def eviction_candidates(self, policy: str, limit: int) -> List[EvictionCandidate]:
+        """扫描目录元数据，选出最久未访问（lru）或命中最少（lfu）的条目"""
+        records = []
+        for path, stat in self._scan_stat():
+            digest = os.path.splitext(os.path.basename(path))[0]
+            if policy == "lfu":
+                rank = (self._hits.get(digest, 0), stat.st_atime)
+            else:
+                rank = (stat.st_atime,)
+            records.append((rank, path, stat.st_mtime, stat.st_size))
+        
+        victims = heapq.nsmallest(limit, records)
+        return [EvictionCandidate(path, mtime, size) for _, path, mtime, size in victims]
+    
+    def discard(self, candidates: List[EvictionCandidate]) -> int:
+        """删除淘汰候选文件，mtime已变化（期间被改写）的文件跳过"""
+        groups = {}
+        for candidate in candidates:
+            groups.setdefault(os.path.basename(candidate.ident)[:3], []).append(candidate)
+        
+        removed = 0
+        for prefix, items in groups.items():
+            with self._entry_lock(prefix):
+                for candidate in items:
+                    try:
+                        if os.stat(candidate.ident).st_mtime != candidate.timestamp:
+                            continue
+                        os.unlink(candidate.ident)
+                        removed += 1
+                    except FileNotFoundError:
+                        continue
+                    self._hits.pop(os.path.splitext(os.path.basename(candidate.ident))[0], None)
+        
+        return removed
+    
+    def _purge_temp_files(self, deadline: float) -> None:
+        """删除写入中途崩溃遗留的临时文件"""
+        with os.scandir(self.cache_dir) as it:
+            for dir_entry in it:
+                if not dir_entry.name.endswith(".tmp"):
+                    continue
+                try:
+                    if dir_entry.stat().st_mtime < deadline:
+                        os.unlink(dir_entry.path)
+                except FileNotFoundError:
+                    pass
+
+class SQLiteBackend(CacheBackend):
+    """SQLite后端，所有条目保存在缓存目录下的单个数据库文件中
+    
+    表结构包含key/timestamp/size/codec/atime/hits/payload列，并在timestamp和atime上建立索引，
+    过期清理、统计和LRU淘汰均为索引查询，无需逐个读取条目内容。二进制编码的内容直接以BLOB保存。
+    """
+    
+    name = "sqlite"
+    
+    def __init__(self, cache_dir: Path, filename: str = "cache.db"):
+        """初始化SQLite后端"""
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.cache_dir / filename
+        # sqlite3连接不能跨线程共享，每个线程使用独立连接
+        self._local = threading.local()
+        self._init_schema()
+    
+    def _get_connection(self) -> sqlite3.Connection:
+        """获取当前线程的数据库连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    def _init_schema(self) -> None:
+        """创建数据表和索引"""
+        conn = self._get_connection()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                "key TEXT PRIMARY KEY, "
+                "timestamp REAL NOT NULL, "
+                "size INTEGER NOT NULL, "
+                "codec TEXT NOT NULL DEFAULT 'json', "
+                "atime REAL NOT NULL DEFAULT 0, "
+                "hits INTEGER NOT NULL DEFAULT 0, "
+                "payload BLOB NOT NULL)"
+            )
+            # 兼容缺少新增列的旧数据库
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(cache_entries)")]
+            for column, definition in [("codec", "TEXT NOT NULL DEFAULT 'json'"),
+                                       ("atime", "REAL NOT NULL DEFAULT 0"),
+                                       ("hits", "INTEGER NOT NULL DEFAULT 0")]:
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE cache_entries ADD COLUMN {column} {definition}")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_cache_entries_timestamp "
+                "ON cache_entries(timestamp)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_cache_entries_atime "
+                "ON cache_entries(atime)"
+            )
+    
+    def load(self, key: str) -> Optional[CacheEntry]:
+        """读取条目"""
+        row = self._get_connection().execute(
+            "SELECT timestamp, size, codec, payload FROM cache_entries WHERE key = ?", (key,)
+        ).fetchone()
+        
+        if row is None:
+            return None
+        
+        return self._row_to_entry((key,) + tuple(row))
+    
+    def _row_to_entry(self, row: tuple) -> CacheEntry:
+        """将(key, timestamp, size, codec, payload)行转换为条目"""
+        key, timestamp, size, codec, payload = row
+        data = bytes(payload)
+        if codec == "json":
+            data = json.loads(data.decode('utf-8'))
+        return CacheEntry(key, data, timestamp, size, codec)
+    
+    def _entry_to_row(self, entry: CacheEntry) -> tuple:
+        """将条目转换为插入语句的参数"""
+        if entry.codec == "json":
+            payload = json.dumps(entry.data, ensure_ascii=False).encode('utf-8')
+        else:
+            payload = entry.data
+        return (entry.key, entry.timestamp, len(payload), entry.codec, entry.timestamp,
+                sqlite3.Binary(payload))
+    
+    def save(self, entry: CacheEntry) -> int:
+        """写入条目"""
+        return self.save_many([entry])[0]
+    
+    def remove(self, key: str) -> None:
+        """删除条目"""
+        conn = self._get_connection()
+        with conn:
+            conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+    
+    def clear(self) -> None:
+        """清空所有条目"""
+        conn = self._get_connection()
+        with conn:
+            conn.execute("DELETE FROM cache_entries")
+    
+    # SQLite单条语句的参数个数上限（旧版本为999）
+    BATCH_SIZE = 500
+    
+    def load_many(self, keys: List[str], workers: int = 0) -> Dict[str, Optional[CacheEntry]]:
+        """使用IN查询分块批量读取条目（SQLite读取不使用线程池），无法解析的条目对应None"""
+        conn = self._get_connection()
+        entries = {}
+        for start in range(0, len(keys), self.BATCH_SIZE):
+            chunk = keys[start:start + self.BATCH_SIZE]
+            rows = conn.execute(
+                "SELECT key, timestamp, size, codec, payload FROM cache_entries "
+                f"WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            for row in rows:
+                try:
+                    entries[row[0]] = self._row_to_entry(row)
+                except Exception as e:
+                    print(f"读取缓存条目失败: {row[0]}: {e}")
+                    entries[row[0]] = None
+        return entries
+    
+    def save_many(self, entries: List[CacheEntry], workers: int = 0) -> List[int]:
+        """在一个事务中批量写入条目"""
+        rows = [self._entry_to_row(entry) for entry in entries]
+        conn = self._get_connection()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO cache_entries "
+                "(key, timestamp, size, codec, atime, hits, payload) "
+                "VALUES (?, ?, ?, ?, ?, 0, ?)",
+                rows
+            )
+        return [row[2] for row in rows]
+    
+    def remove_many(self, keys: List[str], workers: int = 0) -> None:
+        """在一个事务中批量删除条目"""
+        conn = self._get_connection()
+        with conn:
+            conn.executemany("DELETE FROM cache_entries WHERE key = ?", [(key,) for key in keys])
+    
+    def remove_expired(self, key: str, deadline: float) -> bool:
+        """仅当条目仍然过期时删除（单条语句，原子执行）"""
+        conn = self._get_connection()
+        with conn:
+            cursor = conn.execute(
+                "DELETE FROM cache_entries WHERE key = ? AND timestamp < ?", (key, deadline)
+            )
+        return cursor.rowcount > 0
+    
+    def get_stats(self, deadline: float) -> Dict[str, int]:
+        """统计条目数量和大小"""
+        conn = self._get_connection()
+        total, size = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries"
+        ).fetchone()
+        expired = conn.execute(
+            "SELECT COUNT(*) FROM cache_entries WHERE timestamp < ?", (deadline,)
+        ).fetchone()[0]
+        
+        return {
+            "total": total,
+            "valid": total - expired,
+            "expired": expired,
+            "size": size
+        }
+    
+    def purge_expired(self, deadline: float) -> int:
+        """删除过期条目"""
+        conn = self._get_connection()
+        with conn:
+            cursor = conn.execute("DELETE FROM cache_entries WHERE timestamp < ?", (deadline,))
+        return cursor.rowcount
+    
+    def record_access(self, accesses: Dict[str, List[float]]) -> None:
+        """在一个事务中批量更新最后访问时间和命中次数"""
+        conn = self._get_connection()
+        with conn:
+            conn.executemany(
+                "UPDATE cache_entries SET atime = MAX(atime, ?), hits = hits + ? WHERE key = ?",
+                [(access_time, hits, key) for key, (access_time, hits) in accesses.items()]
+            )
+    
+    def eviction_candidates(self, policy: str, limit: int) -> List[EvictionCandidate]:
+        """按atime（lru）或hits（lfu）排序选出淘汰候选"""
+        order = "hits ASC, atime ASC" if policy == "lfu" else "atime ASC"
+        rows = self._get_connection().execute(
+            f"SELECT key, timestamp, size FROM cache_entries ORDER BY {order} LIMIT ?", (limit,)
+        ).fetchall()
+        return [EvictionCandidate(*row) for row in rows]
+    
+    def discard(self, candidates: List[EvictionCandidate]) -> int:
+        """删除淘汰候选条目，timestamp已变化（期间被改写）的条目跳过"""
+        conn = self._get_connection()
+        with conn:
+            removed = 0
+            for candidate in candidates:
+                cursor = conn.execute(
+                    "DELETE FROM cache_entries WHERE key = ? AND timestamp = ?",
+                    (candidate.ident, candidate.timestamp)
+                )
+                removed += cursor.rowcount
+        return removed
+    
+    def close(self) -> None:
+        """关闭当前线程的数据库连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+# 后端名称到实现类的映射
+CACHE_BACKENDS = {
+    JsonDirBackend.name: JsonDirBackend,
+    SQLiteBackend.name: SQLiteBackend
+}
+
+def create_backend(backend: Any, cache_dir: Path, json_indent: Optional[int] = 2) -> CacheBackend:
+    """根据名称创建后端；传入后端实例时直接返回"""
+    if isinstance(backend, CacheBackend):
+        return backend
+    
+    if backend not in CACHE_BACKENDS:
+        raise ValueError(f"不支持的缓存后端: {backend}")
+    
+    if backend == JsonDirBackend.name:
+        return JsonDirBackend(cache_dir, json_indent)
+    return CACHE_BACKENDS[backend](cache_dir)
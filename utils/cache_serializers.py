@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+缓存序列化工具模块
+提供缓存数据的序列化与压缩编码，编码名称格式为"<序列化器>[+<压缩算法>]"，如"pickle+zstd"
+"""
+
+import io
+import json
+import gzip
+import pickle
+from typing import Any, Optional, Tuple
+
+# 可选依赖，未安装时对应的编码不可用
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+# 原生JSON编码：数据直接内嵌在条目中，与原有缓存格式兼容
+JSON_CODEC = "json"
+
+# 自动选择序列化器：DataFrame用parquet，ndarray用numpy，可JSON化的数据用json，其余用pickle
+AUTO_SERIALIZER = "auto"
+
+def _json_dumps(data: Any) -> bytes:
+    """紧凑JSON序列化"""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def _json_loads(payload: bytes) -> Any:
+    """JSON反序列化"""
+    return json.loads(payload.decode('utf-8'))
+
+def _pickle_dumps(data: Any) -> bytes:
+    """pickle序列化"""
+    return pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+
+def _msgpack_dumps(data: Any) -> bytes:
+    """msgpack序列化"""
+    _require(msgpack, "msgpack")
+    return msgpack.packb(data, use_bin_type=True)
+
+def _msgpack_loads(payload: bytes) -> Any:
+    """msgpack反序列化"""
+    _require(msgpack, "msgpack")
+    return msgpack.unpackb(payload, raw=False)
+
+def _numpy_dumps(data: Any) -> bytes:
+    """NumPy数组序列化（.npy格式）"""
+    _require(np, "numpy")
+    buffer = io.BytesIO()
+    np.save(buffer, data, allow_pickle=False)
+    return buffer.getvalue()
+
+def _numpy_loads(payload: bytes) -> Any:
+    """NumPy数组反序列化"""
+    _require(np, "numpy")
+    return np.load(io.BytesIO(payload), allow_pickle=False)
+
+def _parquet_dumps(data: Any) -> bytes:
+    """DataFrame序列化（Parquet格式，需要pyarrow或fastparquet）"""
+    _require(pd, "pandas")
+    buffer = io.BytesIO()
+    data.to_parquet(buffer)
+    return buffer.getvalue()
+
+def _parquet_loads(payload: bytes) -> Any:
+    """DataFrame反序列化"""
+    _require(pd, "pandas")
+    return pd.read_parquet(io.BytesIO(payload))
+
+# 序列化器名称 -> (序列化函数, 反序列化函数)
+SERIALIZERS = {
+    "json": (_json_dumps, _json_loads),
+    "pickle": (_pickle_dumps, pickle.loads),
+    "msgpack": (_msgpack_dumps, _msgpack_loads),
+    "numpy": (_numpy_dumps, _numpy_loads),
+    "parquet": (_parquet_dumps, _parquet_loads),
+}
+
+def _zstd_compress(payload: bytes, level: Optional[int]) -> bytes:
+    """zstd压缩"""
+    _require(zstandard, "zstandard")
+    return zstandard.ZstdCompressor(level=level or 3).compress(payload)
+
+def _zstd_decompress(payload: bytes) -> bytes:
+    """zstd解压"""
+    _require(zstandard, "zstandard")
+    return zstandard.ZstdDecompressor().decompress(payload)
+
+def _lz4_compress(payload: bytes, level: Optional[int]) -> bytes:
+    """lz4压缩"""
+    _require(lz4_frame, "lz4")
+    return lz4_frame.compress(payload, compression_level=level or 0)
+
+def _lz4_decompress(payload: bytes) -> bytes:
+    """lz4解压"""
+    _require(lz4_frame, "lz4")
+    return lz4_frame.decompress(payload)
+
+def _gzip_compress(payload: bytes, level: Optional[int]) -> bytes:
+    """gzip压缩"""
+    return gzip.compress(payload, compresslevel=level or 6)
+
+# 压缩算法名称 -> (压缩函数, 解压函数)
+COMPRESSORS = {
+    "gzip": (_gzip_compress, gzip.decompress),
+    "zstd": (_zstd_compress, _zstd_decompress),
+    "lz4": (_lz4_compress, _lz4_decompress),
+}
+
+def _require(module: Any, name: str) -> None:
+    """检查可选依赖是否已安装"""
+    if module is None:
+        raise ImportError(f"缺少可选依赖 {name}，请先安装: pip install {name}")
+
+def make_codec(serializer: str, compression: Optional[str] = None) -> str:
+    """组合序列化器和压缩算法为编码名称"""
+    return f"{serializer}+{compression}" if compression else serializer
+
+def parse_codec(codec: str) -> Tuple[str, Optional[str]]:
+    """解析编码名称，返回(序列化器, 压缩算法)"""
+    serializer, _, compression = codec.partition("+")
+
+    if serializer != AUTO_SERIALIZER and serializer not in SERIALIZERS:
+        raise ValueError(f"不支持的序列化器: {serializer}")
+    if compression and compression not in COMPRESSORS:
+        raise ValueError(f"不支持的压缩算法: {compression}")
+
+    return serializer, compression or None
+
+def _choose_serializer(data: Any) -> str:
+    """为auto编码选择具体的序列化器"""
+    if pd is not None and isinstance(data, pd.DataFrame):
+        try:
+            import pyarrow  # noqa: F401
+            return "parquet"
+        except ImportError:
+            return "pickle"
+
+    if np is not None and isinstance(data, np.ndarray) and data.dtype != object:
+        return "numpy"
+
+    try:
+        json.dumps(data)
+        return "json"
+    except (TypeError, ValueError):
+        return "pickle"
+
+def resolve_codec(data: Any, codec: str) -> str:
+    """将auto编码解析为实际使用的编码名称"""
+    serializer, compression = parse_codec(codec)
+    if serializer == AUTO_SERIALIZER:
+        serializer = _choose_serializer(data)
+    return make_codec(serializer, compression)
+
+def encode(data: Any, codec: str, level: Optional[int] = None) -> Tuple[bytes, str]:
+    """按编码序列化并压缩数据，返回(字节内容, 实际使用的编码名称)"""
+    codec = resolve_codec(data, codec)
+    serializer, compression = parse_codec(codec)
+
+    payload = SERIALIZERS[serializer][0](data)
+    if compression:
+        payload = COMPRESSORS[compression][0](payload, level)
+
+    return payload, codec
+
+def decode(payload: bytes, codec: str) -> Any:
+    """按条目记录的编码解压并反序列化数据"""
+    serializer, compression = parse_codec(codec)
+
+    if compression:
+        payload = COMPRESSORS[compression][1](payload)
+
+    return SERIALIZERS[serializer][1](payload)
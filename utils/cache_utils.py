@@ -4,150 +4,747 @@
 提供缓存管理、清理、验证等功能
 """
 
-import json
 import time
+import bisect
+import pickle
+import asyncio
 import hashlib
+import inspect
+import functools
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Optional, Union
-from config import CACHE_DIR, CACHE_EXPIRE_TIME
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+from config import (
+    CACHE_DIR, CACHE_EXPIRE_TIME,
+    CACHE_MEMORY_MAX_ENTRIES, CACHE_MEMORY_MAX_BYTES, CACHE_BACKEND,
+    CACHE_SERIALIZER, CACHE_COMPRESSION,
+    CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, CACHE_EVICTION_POLICY, CACHE_JANITOR_INTERVAL,
+    CACHE_STATS_ENABLED, CACHE_STATS_DUMP_INTERVAL, OUTPUT_DATA_DIR
+)
+from utils.cache_backends import (
+    CacheBackend, CacheEntry, RangeLock, create_backend, map_with_workers
+)
+from utils.cache_serializers import pd
+from utils.cache_serializers import JSON_CODEC, make_codec, parse_codec, resolve_codec, encode, decode
+
+@dataclass
+class CacheOptions:
+    """缓存管理器的可选配置"""
+    memory_max_entries: int = CACHE_MEMORY_MAX_ENTRIES  # 内存层最大条目数，0表示不限制
+    memory_max_bytes: int = CACHE_MEMORY_MAX_BYTES      # 内存层最大字节数，0表示不限制
+    backend: Union[str, CacheBackend] = CACHE_BACKEND   # 存储后端名称（json/sqlite）或后端实例
+    serializer: str = CACHE_SERIALIZER                  # 序列化器：json/pickle/msgpack/numpy/parquet/auto
+    compression: Optional[str] = CACHE_COMPRESSION      # 压缩算法：gzip/zstd/lz4，None表示不压缩
+    compression_level: Optional[int] = None             # 压缩级别，None使用各算法默认值
+    json_indent: Optional[int] = 2                      # JSON目录后端的缩进，None写入紧凑JSON
+    max_entries: int = CACHE_MAX_ENTRIES                # 存储后端最大条目数，0表示不限制
+    max_bytes: int = CACHE_MAX_BYTES                    # 存储后端最大字节数，0表示不限制
+    eviction_policy: str = CACHE_EVICTION_POLICY        # 超出上限时的淘汰策略：lru/lfu
+    janitor_interval: float = CACHE_JANITOR_INTERVAL    # 后台清理线程的运行间隔（秒），0表示不启动
+    stats_enabled: bool = CACHE_STATS_ENABLED           # 是否记录操作计数和延迟
+    stats_dump_interval: float = CACHE_STATS_DUMP_INTERVAL  # 定期导出统计到OUTPUT_DATA_DIR的间隔（秒），0表示不导出
+
+class MemoryCache:
+    """进程内LRU内存缓存层
+    
+    条目按最近使用顺序保存在OrderedDict中，超出条目数或字节预算时淘汰最久未使用的条目。
+    条目的过期判断使用写入磁盘时的时间戳，与磁盘缓存的过期时间保持一致。
+    注意：命中时直接返回缓存的对象本身，调用方不应原地修改返回值。
+    """
+    
+    def __init__(self, max_entries: int = 0, max_bytes: int = 0):
+        """初始化内存缓存层"""
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.total_bytes = 0
+        self._entries = OrderedDict()  # key -> (data, timestamp, size)
+        self._lock = threading.Lock()
+    
+    @property
+    def enabled(self) -> bool:
+        """是否启用内存层"""
+        return self.max_entries > 0 or self.max_bytes > 0
+    
+    def get(self, key: str, expire_time: float) -> Tuple[bool, Any]:
+        """获取条目，返回(是否命中, 数据)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            
+            data, timestamp, size = entry
+            if time.time() - timestamp > expire_time:
+                self._remove(key)
+                self.misses += 1
+                return False, None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, data
+    
+    def set(self, entry: CacheEntry) -> None:
+        """写入条目（data为解码后的数据），并按LRU顺序淘汰超出预算的条目"""
+        # 单个条目超过字节预算时不放入内存层
+        if self.max_bytes and entry.size > self.max_bytes:
+            self.delete(entry.key)
+            return
+        
+        with self._lock:
+            self._remove(entry.key)
+            self._entries[entry.key] = (entry.data, entry.timestamp, entry.size)
+            self.total_bytes += entry.size
+            
+            while self._entries and (
+                (self.max_entries and len(self._entries) > self.max_entries) or
+                (self.max_bytes and self.total_bytes > self.max_bytes)
+            ):
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+    
+    def delete(self, key: str) -> None:
+        """删除条目"""
+        with self._lock:
+            self._remove(key)
+    
+    def clear(self) -> None:
+        """清空内存层"""
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+    
+    def _remove(self, key: str) -> None:
+        """移除条目（调用方需持有锁）"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry[2]
+    
+    def get_info(self) -> Dict[str, Any]:
+        """获取内存层统计信息"""
+        with self._lock:
+            return {
+                "内存条目数": len(self._entries),
+                "内存占用": self.total_bytes,
+                "内存命中": self.hits,
+                "内存未命中": self.misses
+            }
+
+class CacheStats:
+    """缓存操作统计
+    
+    按操作（get/set/delete/expire/evict等）和结果（hit/miss/expired/error/ok）计数，
+    并用按2倍递增的固定分桶记录延迟直方图。每次记录只做一次二分查找和几次加法，开销很小。
+    """
+    
+    # 延迟分桶上界（秒）：10微秒到约10秒
+    BUCKETS = [0.00001 * 2 ** i for i in range(21)]
+    
+    def __init__(self, enabled: bool = True):
+        """初始化统计"""
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self) -> None:
+        """清空所有统计"""
+        with self._lock:
+            self._outcomes = {}   # 操作 -> {结果: 次数}
+            self._latency = {}    # 操作 -> [分桶计数列表, 总耗时, 最大耗时]
+            self._bytes = {"read": 0, "written": 0}
+            self._started = time.time()
+    
+    def record(self, op: str, outcome: str, elapsed: float) -> None:
+        """记录一次操作的结果和耗时"""
+        if not self.enabled:
+            return
+        
+        index = bisect.bisect_left(self.BUCKETS, elapsed)
+        with self._lock:
+            outcomes = self._outcomes.setdefault(op, {})
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+            
+            latency = self._latency.get(op)
+            if latency is None:
+                latency = self._latency[op] = [[0] * (len(self.BUCKETS) + 1), 0.0, 0.0]
+            latency[0][index] += 1
+            latency[1] += elapsed
+            if elapsed > latency[2]:
+                latency[2] = elapsed
+    
+    def count(self, op: str, outcome: str, amount: int = 1) -> None:
+        """只计数不记录耗时（批量操作中的单个键、淘汰的条目数等）"""
+        if not self.enabled:
+            return
+        
+        with self._lock:
+            outcomes = self._outcomes.setdefault(op, {})
+            outcomes[outcome] = outcomes.get(outcome, 0) + amount
+    
+    def add_bytes(self, direction: str, size: int) -> None:
+        """累加读取（read）或写入（written）的字节数"""
+        if not self.enabled:
+            return
+        
+        with self._lock:
+            self._bytes[direction] += size
+    
+    def _percentile(self, buckets: List[int], total: int, ratio: float) -> float:
+        """根据直方图估算分位数，返回所在分桶的上界（秒），调用方再以最大值截断"""
+        threshold = total * ratio
+        cumulative = 0
+        for index, count in enumerate(buckets):
+            cumulative += count
+            if cumulative >= threshold:
+                return self.BUCKETS[min(index, len(self.BUCKETS) - 1)]
+        return self.BUCKETS[-1]
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """导出统计快照，延迟单位为毫秒"""
+        with self._lock:
+            outcomes = {op: dict(counts) for op, counts in self._outcomes.items()}
+            latency = {op: (list(item[0]), item[1], item[2]) for op, item in self._latency.items()}
+            bytes_stats = dict(self._bytes)
+            started = self._started
+        
+        operations = {}
+        for op, counts in outcomes.items():
+            info = {"total": sum(counts.values()), "outcomes": counts}
+            if op in latency:
+                buckets, total_time, max_time = latency[op]
+                measured = sum(buckets)
+                info["latency_ms"] = {"mean": round(total_time / measured * 1000, 4)}
+                for name, ratio in [("p50", 0.5), ("p90", 0.9), ("p99", 0.99)]:
+                    value = min(self._percentile(buckets, measured, ratio), max_time)
+                    info["latency_ms"][name] = round(value * 1000, 4)
+                info["latency_ms"]["max"] = round(max_time * 1000, 4)
+            operations[op] = info
+        
+        get_counts = outcomes.get("get", {})
+        lookups = sum(get_counts.values()) - get_counts.get("error", 0)
+        
+        return {
+            "since": started,
+            "uptime": round(time.time() - started, 3),
+            "hit_ratio": round(get_counts.get("hit", 0) / lookups, 4) if lookups else None,
+            "bytes_read": bytes_stats["read"],
+            "bytes_written": bytes_stats["written"],
+            "operations": operations
+        }
+
+class StatsDumper(threading.Thread):
+    """定期将缓存统计导出为JSON文件的后台线程"""
+    
+    def __init__(self, manager: "CacheManager", interval: float):
+        """初始化导出线程"""
+        super().__init__(name="cache-stats-dumper", daemon=True)
+        self.manager = manager
+        self.interval = interval
+        self._stop_event = threading.Event()
+    
+    def run(self) -> None:
+        """循环导出，直到被停止"""
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.manager.dump_stats()
+            except Exception as e:
+                print(f"导出缓存统计失败: {e}")
+    
+    def stop(self) -> None:
+        """停止导出线程并等待退出"""
+        self._stop_event.set()
+        self.join()
+
+class CacheJanitor(threading.Thread):
+    """后台清理线程
+    
+    周期性清理过期条目，并在超出容量上限时分批淘汰条目；
+    写入时发现超限也只唤醒该线程，不在请求线程中执行清理。
+    """
+    
+    # 每批淘汰的条目数，批次之间让出执行权
+    BATCH_SIZE = 256
+    
+    def __init__(self, manager: "CacheManager", interval: float):
+        """初始化清理线程"""
+        super().__init__(name="cache-janitor", daemon=True)
+        self.manager = manager
+        self.interval = interval
+        self._wake_event = threading.Event()
+        self._stop_event = threading.Event()
+    
+    def run(self) -> None:
+        """循环执行清理，直到被停止"""
+        while not self._stop_event.is_set():
+            self._wake_event.wait(self.interval)
+            self._wake_event.clear()
+            if self._stop_event.is_set():
+                break
+            
+            try:
+                self.manager.cleanup_expired()
+                self.manager.evict(self.BATCH_SIZE)
+            except Exception as e:
+                print(f"缓存清理线程出错: {e}")
+    
+    def wake(self) -> None:
+        """立即唤醒清理线程"""
+        self._wake_event.set()
+    
+    def stop(self) -> None:
+        """停止清理线程并等待退出"""
+        self._stop_event.set()
+        self._wake_event.set()
+        self.join()
 
 class CacheManager:
     """缓存管理器"""
     
-    def __init__(self, cache_dir: Optional[Path] = None, expire_time: int = None):
+    def __init__(self, cache_dir: Optional[Path] = None, expire_time: int = None,
+                 options: Optional[CacheOptions] = None):
         """初始化缓存管理器"""
         self.cache_dir = cache_dir or CACHE_DIR
         self.expire_time = expire_time or CACHE_EXPIRE_TIME
+        self.options = options or CacheOptions()
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        
+        # 存储后端，负责条目的持久化
+        self.backend = create_backend(self.options.backend, self.cache_dir,
+                                      self.options.json_indent)
+        
+        # 默认编码，写入时可按调用覆盖
+        self.codec = make_codec(self.options.serializer, self.options.compression)
+        parse_codec(self.codec)
+        
+        # 内存缓存层，位于磁盘缓存之前
+        self.memory = MemoryCache(self.options.memory_max_entries,
+                                  self.options.memory_max_bytes)
+        
+        # 容量上限相关状态：待写入后端的访问记录、近似的条目数和字节数
+        if self.options.eviction_policy not in ("lru", "lfu"):
+            raise ValueError(f"不支持的淘汰策略: {self.options.eviction_policy}")
+        self._access_log = {}  # key -> [最后访问时间, 命中次数]
+        self._access_lock = threading.Lock()
+        self._usage = None     # [条目数, 字节数]，首次写入时从后端统计
+        self._usage_lock = threading.Lock()
+        self._evict_lock = threading.Lock()
+        
+        self.janitor = None
+        if self.options.janitor_interval > 0:
+            self.start_janitor()
+        
+        # 操作统计，可选定期导出
+        self.stats = CacheStats(self.options.stats_enabled)
+        self.stats_dumper = None
+        if self.options.stats_dump_interval > 0:
+            self.stats_dumper = StatsDumper(self, self.options.stats_dump_interval)
+            self.stats_dumper.start()
+    
+    @property
+    def bounded(self) -> bool:
+        """是否设置了容量上限"""
+        return self.options.max_entries > 0 or self.options.max_bytes > 0
     
-    def _get_cache_key(self, key: str) -> str:
-        """生成缓存键"""
-        # 使用MD5哈希确保文件名安全
-        return hashlib.md5(key.encode('utf-8')).hexdigest()
+    def _encode_entry(self, key: str, data: Any, codec: Optional[str] = None) -> CacheEntry:
+        """按编码构造缓存条目，json编码直接内嵌原始数据"""
+        codec = resolve_codec(data, codec or self.codec)
+        if codec == JSON_CODEC:
+            return CacheEntry(key, data, time.time())
+        
+        payload, codec = encode(data, codec, self.options.compression_level)
+        return CacheEntry(key, payload, time.time(), len(payload), codec)
     
-    def _get_cache_path(self, key: str) -> Path:
-        """获取缓存文件路径"""
-        cache_key = self._get_cache_key(key)
-        return self.cache_dir / f"{cache_key}.json"
+    def _decode_entry(self, entry: CacheEntry) -> Any:
+        """按条目记录的编码还原数据"""
+        if entry.codec == JSON_CODEC:
+            return entry.data
+        return decode(entry.data, entry.codec)
     
-    def set_cache(self, key: str, data: Any) -> bool:
-        """设置缓存"""
+    def set_cache(self, key: str, data: Any, codec: Optional[str] = None) -> bool:
+        """设置缓存，codec可覆盖管理器默认编码（如"pickle+zstd"）"""
+        start = time.perf_counter()
         try:
-            cache_path = self._get_cache_path(key)
-            cache_data = {
-                "data": data,
-                "timestamp": time.time(),
-                "key": key
-            }
+            entry = self._encode_entry(key, data, codec)
+            entry.size = self.backend.save(entry)
+            
+            # 内存层不保存调用方的对象（调用方之后修改它会影响命中结果），下次从后端读取时再回填
+            self.memory.delete(key)
             
-            with open(cache_path, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, ensure_ascii=False, indent=2)
+            if self.bounded:
+                self._track_write(entry.size, 1)
             
+            self.stats.add_bytes("written", entry.size)
+            self.stats.record("set", "ok", time.perf_counter() - start)
             return True
         except Exception as e:
+            self.stats.record("set", "error", time.perf_counter() - start)
             print(f"设置缓存失败: {e}")
             return False
     
-    def get_cache(self, key: str) -> Optional[Any]:
-        """获取缓存"""
+    def get_cache(self, key: str, expire_time: Optional[float] = None) -> Optional[Any]:
+        """获取缓存，expire_time可为本次读取指定更短的过期时间"""
+        # 优先查询内存层
+        hit, data = self._get_from_memory(key, expire_time)
+        if hit:
+            return data
+        return self._get_from_backend(key, expire_time)
+    
+    def _get_from_memory(self, key: str, expire_time: Optional[float] = None) -> Tuple[bool, Any]:
+        """查询内存层，返回(是否命中, 数据)；不涉及磁盘I/O"""
+        if not self.memory.enabled:
+            return False, None
+        
+        start = time.perf_counter()
+        hit, data = self.memory.get(key, expire_time or self.expire_time)
+        if hit:
+            self._record_access(key)
+            self.stats.record("get", "hit", time.perf_counter() - start)
+        return hit, data
+    
+    def _get_from_backend(self, key: str, expire_time: Optional[float] = None) -> Optional[Any]:
+        """从存储后端读取缓存，并回填内存层"""
+        expire_time = expire_time or self.expire_time
+        start = time.perf_counter()
         try:
-            cache_path = self._get_cache_path(key)
-            
-            if not cache_path.exists():
+            entry = self.backend.load(key)
+            if entry is None:
+                self.stats.record("get", "miss", time.perf_counter() - start)
                 return None
             
-            with open(cache_path, 'r', encoding='utf-8') as f:
-                cache_data = json.load(f)
-            
-            # 检查是否过期
-            if time.time() - cache_data["timestamp"] > self.expire_time:
-                self.delete_cache(key)
+            # 检查是否过期，删除前由后端再次确认，避免误删其他进程刚写入的新值
+            if time.time() - entry.timestamp > expire_time:
+                self.memory.delete(key)
+                self.backend.remove_expired(key, time.time() - expire_time)
+                self.stats.record("get", "expired", time.perf_counter() - start)
                 return None
             
-            return cache_data["data"]
+            data = self._decode_entry(entry)
+            if self.memory.enabled:
+                self.memory.set(CacheEntry(key, data, entry.timestamp, entry.size, entry.codec))
+            self._record_access(key)
+            
+            self.stats.add_bytes("read", entry.size)
+            self.stats.record("get", "hit", time.perf_counter() - start)
+            return data
         except Exception as e:
+            self.stats.record("get", "error", time.perf_counter() - start)
             print(f"获取缓存失败: {e}")
             return None
     
     def delete_cache(self, key: str) -> bool:
         """删除缓存"""
+        start = time.perf_counter()
         try:
-            cache_path = self._get_cache_path(key)
-            if cache_path.exists():
-                cache_path.unlink()
+            self.memory.delete(key)
+            self.backend.remove(key)
+            self.stats.record("delete", "ok", time.perf_counter() - start)
             return True
         except Exception as e:
+            self.stats.record("delete", "error", time.perf_counter() - start)
             print(f"删除缓存失败: {e}")
             return False
     
     def clear_cache(self) -> bool:
         """清空所有缓存"""
         try:
-            for cache_file in self.cache_dir.glob("*.json"):
-                cache_file.unlink()
+            self.memory.clear()
+            with self._access_lock:
+                self._access_log.clear()
+            self.backend.clear()
+            with self._usage_lock:
+                self._usage = None
             return True
         except Exception as e:
             print(f"清空缓存失败: {e}")
             return False
     
-    def get_cache_info(self) -> Dict[str, Any]:
-        """获取缓存信息"""
-        cache_files = list(self.cache_dir.glob("*.json"))
-        total_size = sum(f.stat().st_size for f in cache_files)
+    # ==================== 批量操作 ====================
+    def get_many(self, keys: Iterable[str], workers: int = 0) -> Tuple[Dict[str, Any], List[str]]:
+        """批量获取缓存，返回(命中的 键 -> 数据, 未命中的键列表)
         
-        # 统计过期缓存
-        expired_count = 0
-        valid_count = 0
-        
-        for cache_file in cache_files:
-            try:
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    cache_data = json.load(f)
+        未命中列表保持输入顺序，调用方可只计算缺失的部分；workers大于1时用线程池并发读取磁盘。
+        """
+        start = time.perf_counter()
+        keys = list(dict.fromkeys(keys))
+        hits = {}
+        outcome = "ok"
+        try:
+            pending = []
+            for key in keys:
+                if self.memory.enabled:
+                    hit, data = self.memory.get(key, self.expire_time)
+                    if hit:
+                        hits[key] = data
+                        self._record_access(key)
+                        self.stats.count("get", "hit")
+                        continue
+                pending.append(key)
+            
+            entries = self.backend.load_many(pending, workers)
+            deadline = time.time() - self.expire_time
+            for key, entry in entries.items():
+                # 损坏的条目按未命中返回，不影响其他键
+                if entry is None:
+                    self.stats.count("get", "error")
+                    continue
+                
+                if entry.timestamp < deadline:
+                    self.memory.delete(key)
+                    self.backend.remove_expired(key, deadline)
+                    self.stats.count("get", "expired")
+                    continue
                 
-                if time.time() - cache_data["timestamp"] > self.expire_time:
-                    expired_count += 1
-                else:
-                    valid_count += 1
-            except:
-                expired_count += 1
+                try:
+                    data = self._decode_entry(entry)
+                except Exception as e:
+                    self.stats.count("get", "error")
+                    print(f"解码缓存失败: {key}: {e}")
+                    continue
+                if self.memory.enabled:
+                    self.memory.set(CacheEntry(key, data, entry.timestamp, entry.size, entry.codec))
+                self._record_access(key)
+                self.stats.count("get", "hit")
+                self.stats.add_bytes("read", entry.size)
+                hits[key] = data
+            
+            for key in pending:
+                if key not in entries:
+                    self.stats.count("get", "miss")
+        except Exception as e:
+            outcome = "error"
+            print(f"批量获取缓存失败: {e}")
         
-        return {
-            "总文件数": len(cache_files),
-            "有效缓存": valid_count,
-            "过期缓存": expired_count,
-            "总大小": total_size,
-            "缓存目录": str(self.cache_dir)
+        self.stats.record("get_many", outcome, time.perf_counter() - start)
+        return hits, [key for key in keys if key not in hits]
+    
+    def set_many(self, mapping: Dict[str, Any], codec: Optional[str] = None,
+                 workers: int = 0) -> bool:
+        """批量设置缓存，workers大于1时用线程池并发编码和写入"""
+        start = time.perf_counter()
+        try:
+            items = list(mapping.items())
+            entries = map_with_workers(lambda item: self._encode_entry(item[0], item[1], codec),
+                                       items, workers)
+            sizes = self.backend.save_many(entries, workers)
+            
+            # 与set_cache一致，只使旧的内存条目失效
+            for key, _ in items:
+                self.memory.delete(key)
+            
+            if self.bounded and entries:
+                self._track_write(sum(sizes), len(entries))
+            
+            self.stats.add_bytes("written", sum(sizes))
+            self.stats.record("set_many", "ok", time.perf_counter() - start)
+            return True
+        except Exception as e:
+            self.stats.record("set_many", "error", time.perf_counter() - start)
+            print(f"批量设置缓存失败: {e}")
+            return False
+    
+    def delete_many(self, keys: Iterable[str], workers: int = 0) -> bool:
+        """批量删除缓存"""
+        start = time.perf_counter()
+        try:
+            keys = list(keys)
+            for key in keys:
+                self.memory.delete(key)
+            self.backend.remove_many(keys, workers)
+            self.stats.record("delete_many", "ok", time.perf_counter() - start)
+            return True
+        except Exception as e:
+            self.stats.record("delete_many", "error", time.perf_counter() - start)
+            print(f"批量删除缓存失败: {e}")
+            return False
+    
+    def lock(self, key: str) -> RangeLock:
+        """获取键对应的跨进程锁，用于调用方自己的"读取-计算-写入"流程
+        
+        所有键共用.locks/keys.lock一个锁文件，各自锁定按键哈希确定的字节范围，
+        锁文件不随键的数量增长；不同的键互不阻塞，因此持有一个键的锁时可以再获取其他键的锁
+        （如被缓存的函数递归或嵌套调用）。该锁与后端内部的条目锁相互独立，持有期间仍可正常读写缓存。
+        同一个键的锁不可重入。
+        """
+        return RangeLock(self.cache_dir / ".locks" / "keys.lock", key)
+    
+    def get_cache_info(self) -> Dict[str, Any]:
+        """获取缓存信息"""
+        stats = self.backend.get_stats(time.time() - self.expire_time)
+        
+        info = {
+            "总文件数": stats["total"],
+            "有效缓存": stats["valid"],
+            "过期缓存": stats["expired"],
+            "总大小": stats["size"],
+            "缓存目录": str(self.cache_dir),
+            "存储后端": self.backend.name
         }
+        info.update(self.memory.get_info())
+        
+        return info
     
     def cleanup_expired(self) -> int:
-        """清理过期缓存，返回清理的文件数"""
-        cleaned_count = 0
+        """清理过期缓存，返回清理的条目数"""
+        start = time.perf_counter()
+        try:
+            cleaned_count = self.backend.purge_expired(time.time() - self.expire_time)
+        except Exception:
+            self.stats.record("expire", "error", time.perf_counter() - start)
+            raise
+        self.stats.record("expire", "ok", time.perf_counter() - start)
+        self.stats.count("entries", "expired", cleaned_count)
+        return cleaned_count
+    
+    # ==================== 统计 ====================
+    def get_stats(self) -> Dict[str, Any]:
+        """获取操作计数、命中率、读写字节数和延迟分布"""
+        stats = self.stats.snapshot()
+        stats["memory"] = self.memory.get_info()
+        return stats
+    
+    def reset_stats(self) -> None:
+        """清空操作统计"""
+        self.stats.reset()
+    
+    def dump_stats(self, file_path: Optional[Path] = None) -> Path:
+        """将统计导出为JSON文件，默认写入OUTPUT_DATA_DIR/cache_stats.json"""
+        from utils.file_utils import write_json
         
-        for cache_file in self.cache_dir.glob("*.json"):
-            try:
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    cache_data = json.load(f)
-                
-                if time.time() - cache_data["timestamp"] > self.expire_time:
-                    cache_file.unlink()
-                    cleaned_count += 1
-            except:
-                # 如果文件损坏，也删除
-                cache_file.unlink()
-                cleaned_count += 1
+        file_path = Path(file_path or OUTPUT_DATA_DIR / "cache_stats.json")
+        stats = self.get_stats()
+        stats["cache_dir"] = str(self.cache_dir)
+        stats["dumped_at"] = time.time()
+        write_json(stats, file_path)
+        return file_path
+    
+    # ==================== 容量上限与淘汰 ====================
+    def _record_access(self, key: str) -> None:
+        """记录命中的访问时间和次数，累积后批量写入后端"""
+        if not self.bounded:
+            return
         
-        return cleaned_count
+        with self._access_lock:
+            item = self._access_log.get(key)
+            if item is None:
+                self._access_log[key] = [time.time(), 1]
+            else:
+                item[0] = time.time()
+                item[1] += 1
+            full = len(self._access_log) >= 1024
+        
+        if full:
+            if self.janitor is not None:
+                self.janitor.wake()
+            else:
+                self.flush_access_log()
+    
+    def flush_access_log(self) -> None:
+        """将累积的访问记录写入后端"""
+        with self._access_lock:
+            accesses, self._access_log = self._access_log, {}
+        if accesses:
+            self.backend.record_access(accesses)
+    
+    def _is_over(self, count: int, size: int, ratio: float = 1.0) -> bool:
+        """判断条目数或字节数是否超过上限的ratio倍"""
+        max_entries, max_bytes = self.options.max_entries, self.options.max_bytes
+        return bool((max_entries and count > max_entries * ratio) or
+                    (max_bytes and size > max_bytes * ratio))
+    
+    def _track_write(self, size: int, count: int) -> None:
+        """写入count个条目（共size字节）后累加近似用量，超过上限时触发淘汰"""
+        with self._usage_lock:
+            if self._usage is None:
+                stats = self.backend.get_stats(0)
+                self._usage = [stats["total"], stats["size"]]
+            else:
+                # 覆盖写入也按新增计算，偏大的估计会在淘汰时按实际用量校正
+                self._usage[0] += count
+                self._usage[1] += size
+            over = self._is_over(*self._usage)
+        
+        if over:
+            if self.janitor is not None:
+                self.janitor.wake()
+            else:
+                self.evict()
+    
+    def evict(self, batch_size: int = 0) -> int:
+        """超出容量上限时按淘汰策略删除条目，直到低于上限的90%，返回淘汰的条目数
+        
+        batch_size大于0时分批淘汰，批次之间让出执行权（后台清理线程使用）。
+        """
+        if not self.bounded:
+            return 0
+        
+        # 同一时间只允许一个淘汰流程
+        if not self._evict_lock.acquire(blocking=False):
+            return 0
+        try:
+            start = time.perf_counter()
+            self.flush_access_log()
+            stats = self.backend.get_stats(0)
+            count, size = stats["total"], stats["size"]
+            
+            evicted = 0
+            if self._is_over(count, size):
+                while self._is_over(count, size, 0.9):
+                    excess = count - int(self.options.max_entries * 0.9) if self.options.max_entries else 0
+                    limit = batch_size or max(excess, 64)
+                    candidates = self.backend.eviction_candidates(self.options.eviction_policy, limit)
+                    
+                    victims = []
+                    for candidate in candidates:
+                        if not self._is_over(count, size, 0.9):
+                            break
+                        victims.append(candidate)
+                        count -= 1
+                        size -= candidate.size
+                    
+                    removed = self.backend.discard(victims)
+                    evicted += removed
+                    if removed == 0:
+                        break
+                    if batch_size:
+                        time.sleep(0)
+            
+            with self._usage_lock:
+                self._usage = [count, size]
+            
+            if evicted:
+                self.stats.record("evict", "ok", time.perf_counter() - start)
+                self.stats.count("entries", "evicted", evicted)
+            return evicted
+        finally:
+            self._evict_lock.release()
+    
+    def start_janitor(self, interval: Optional[float] = None) -> None:
+        """启动后台清理线程"""
+        if self.janitor is not None:
+            return
+        self.janitor = CacheJanitor(self, interval or self.options.janitor_interval or 60)
+        self.janitor.start()
+    
+    def stop_janitor(self) -> None:
+        """停止后台清理线程"""
+        if self.janitor is not None:
+            self.janitor.stop()
+            self.janitor = None
 
 # 全局缓存管理器实例
 cache_manager = CacheManager()
 
-def get_cache(key: str) -> Optional[Any]:
+def get_cache(key: str, expire_time: Optional[float] = None) -> Optional[Any]:
     """获取缓存的便捷函数"""
-    return cache_manager.get_cache(key)
+    return cache_manager.get_cache(key, expire_time)
 
-def set_cache(key: str, data: Any) -> bool:
+def set_cache(key: str, data: Any, codec: Optional[str] = None) -> bool:
     """设置缓存的便捷函数"""
-    return cache_manager.set_cache(key, data)
+    return cache_manager.set_cache(key, data, codec)
 
 def delete_cache(key: str) -> bool:
     """删除缓存的便捷函数"""
@@ -163,4 +760,324 @@ def get_cache_info() -> Dict[str, Any]:
 
 def cleanup_expired_cache() -> int:
     """清理过期缓存的便捷函数"""
-    return cache_manager.cleanup_expired() 
\ No newline at end of file
+    return cache_manager.cleanup_expired()
+
+def get_many(keys: Iterable[str], workers: int = 0) -> Tuple[Dict[str, Any], List[str]]:
+    """批量获取缓存的便捷函数"""
+    return cache_manager.get_many(keys, workers)
+
+def set_many(mapping: Dict[str, Any], codec: Optional[str] = None, workers: int = 0) -> bool:
+    """批量设置缓存的便捷函数"""
+    return cache_manager.set_many(mapping, codec, workers)
+
+def delete_many(keys: Iterable[str], workers: int = 0) -> bool:
+    """批量删除缓存的便捷函数"""
+    return cache_manager.delete_many(keys, workers)
+
+def get_cache_stats() -> Dict[str, Any]:
+    """获取缓存统计的便捷函数"""
+    return cache_manager.get_stats()
+
+def evict_cache() -> int:
+    """按容量上限淘汰缓存的便捷函数"""
+    return cache_manager.evict() 
+
+# ==================== 异步缓存 ====================
+class AsyncCacheManager:
+    """异步缓存管理器
+    
+    包装同步的CacheManager，共用同一存储格式；磁盘读写在线程池中执行，不阻塞事件循环。
+    内存层命中时直接在事件循环中返回；同一事件循环内对同一个键的并发读取合并为一次磁盘读取。
+    """
+    
+    def __init__(self, manager: Optional[CacheManager] = None,
+                 executor: Optional[Executor] = None):
+        """初始化异步缓存管理器，executor为None时使用事件循环的默认线程池"""
+        self.manager = manager or cache_manager
+        self.executor = executor
+        # (事件循环id, 键, 过期时间) -> 正在进行的读取任务
+        self._inflight = {}
+    
+    async def _run(self, func: Callable, *args) -> Any:
+        """在线程池中执行同步函数"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args))
+    
+    async def aget_cache(self, key: str, expire_time: Optional[float] = None) -> Optional[Any]:
+        """异步获取缓存"""
+        hit, data = self.manager._get_from_memory(key, expire_time)
+        if hit:
+            return data
+        
+        inflight_key = (id(asyncio.get_running_loop()), key, expire_time)
+        task = self._inflight.get(inflight_key)
+        if task is None:
+            task = asyncio.ensure_future(self._run(self.manager._get_from_backend, key, expire_time))
+            self._inflight[inflight_key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(inflight_key, None))
+        
+        # shield避免单个等待者被取消时中断其他等待者共享的读取
+        return await asyncio.shield(task)
+    
+    async def aset_cache(self, key: str, data: Any, codec: Optional[str] = None) -> bool:
+        """异步设置缓存"""
+        return await self._run(self.manager.set_cache, key, data, codec)
+    
+    async def adelete_cache(self, key: str) -> bool:
+        """异步删除缓存"""
+        return await self._run(self.manager.delete_cache, key)
+    
+    async def aget_many(self, keys: Iterable[str], workers: int = 0) -> Tuple[Dict[str, Any], List[str]]:
+        """异步批量获取缓存"""
+        return await self._run(self.manager.get_many, list(keys), workers)
+    
+    async def aset_many(self, mapping: Dict[str, Any], codec: Optional[str] = None) -> bool:
+        """异步批量设置缓存"""
+        return await self._run(self.manager.set_many, dict(mapping), codec)
+    
+    async def adelete_many(self, keys: Iterable[str]) -> bool:
+        """异步批量删除缓存"""
+        return await self._run(self.manager.delete_many, list(keys))
+
+# 全局异步缓存管理器实例，与cache_manager共用存储
+async_cache_manager = AsyncCacheManager(cache_manager)
+
+async def aget_cache(key: str, expire_time: Optional[float] = None) -> Optional[Any]:
+    """异步获取缓存的便捷函数"""
+    return await async_cache_manager.aget_cache(key, expire_time)
+
+async def aset_cache(key: str, data: Any, codec: Optional[str] = None) -> bool:
+    """异步设置缓存的便捷函数"""
+    return await async_cache_manager.aset_cache(key, data, codec)
+
+async def adelete_cache(key: str) -> bool:
+    """异步删除缓存的便捷函数"""
+    return await async_cache_manager.adelete_cache(key)
+
+# ==================== 函数结果缓存 ====================
+def _hash_file(hasher: Any, path: Path, path_mode: str) -> None:
+    """将文件的修改时间或内容写入哈希"""
+    if not path.is_file():
+        return
+    
+    if path_mode == "content":
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                hasher.update(chunk)
+    else:
+        stat = path.stat()
+        hasher.update(f"{stat.st_mtime_ns}:{stat.st_size}".encode('utf-8'))
+
+def _hash_pandas(hasher: Any, value: Any) -> None:
+    """写入DataFrame/Series的逐行哈希，含列表等不可哈希单元格时退回pickle或repr"""
+    try:
+        hasher.update(pd.util.hash_pandas_object(value, index=True).values.tobytes())
+    except TypeError:
+        try:
+            hasher.update(pickle.dumps(value, protocol=4))
+        except Exception:
+            hasher.update(repr(value.to_dict()).encode('utf-8'))
+
+def _hash_value(hasher: Any, value: Any, path_mode: str) -> None:
+    """将参数值以稳定的方式写入哈希"""
+    # 写入类型名，避免1与"1"等不同类型的值产生相同的键
+    hasher.update(type(value).__qualname__.encode('utf-8') + b":")
+    
+    if value is None or isinstance(value, (bool, int, float, str)):
+        hasher.update(repr(value).encode('utf-8'))
+    elif isinstance(value, (bytes, bytearray)):
+        hasher.update(bytes(value))
+    elif isinstance(value, Path):
+        hasher.update(str(value).encode('utf-8'))
+        _hash_file(hasher, value, path_mode)
+    elif isinstance(value, (list, tuple)):
+        hasher.update(f"{len(value)}[".encode('utf-8'))
+        for item in value:
+            _hash_value(hasher, item, path_mode)
+        hasher.update(b"]")
+    elif isinstance(value, dict):
+        # 按键的哈希排序，与字典插入顺序无关
+        items = sorted((_digest(k, path_mode), v) for k, v in value.items())
+        hasher.update(f"{len(items)}{{".encode('utf-8'))
+        for key_digest, item in items:
+            hasher.update(key_digest.encode('utf-8'))
+            _hash_value(hasher, item, path_mode)
+        hasher.update(b"}")
+    elif isinstance(value, (set, frozenset)):
+        for item_digest in sorted(_digest(item, path_mode) for item in value):
+            hasher.update(item_digest.encode('utf-8'))
+    elif pd is not None and isinstance(value, pd.DataFrame):
+        # DataFrame：按列名、类型和逐行哈希计算
+        hasher.update(repr(list(value.columns)).encode('utf-8'))
+        hasher.update(repr(list(value.dtypes.astype(str))).encode('utf-8'))
+        _hash_pandas(hasher, value)
+    elif pd is not None and isinstance(value, pd.Series):
+        hasher.update(f"{value.name}:{value.dtype}".encode('utf-8'))
+        _hash_pandas(hasher, value)
+    elif hasattr(value, "dtype") and hasattr(value, "tobytes"):
+        # NumPy数组
+        hasher.update(f"{value.dtype}{value.shape}".encode('utf-8'))
+        hasher.update(value.tobytes())
+    else:
+        try:
+            hasher.update(pickle.dumps(value, protocol=4))
+        except Exception:
+            hasher.update(repr(value).encode('utf-8'))
+
+def _digest(value: Any, path_mode: str) -> str:
+    """计算单个值的哈希摘要"""
+    hasher = hashlib.blake2b(digest_size=16)
+    _hash_value(hasher, value, path_mode)
+    return hasher.hexdigest()
+
+def make_cache_key(func: Callable, call_args: Tuple[tuple, dict], path_mode: str = "mtime") -> str:
+    """根据函数限定名和参数(args, kwargs)生成稳定的缓存键，path_mode为mtime或content"""
+    args, kwargs = call_args
+    # 绑定参数并补全默认值，使f(1)与f(x=1)得到相同的键
+    try:
+        bound = inspect.signature(func).bind(*args, **kwargs)
+        bound.apply_defaults()
+        args, kwargs = bound.args, bound.kwargs
+    except (TypeError, ValueError):
+        pass
+    
+    name = f"{func.__module__}.{func.__qualname__}"
+    return f"cached:{name}:{_digest((args, kwargs), path_mode)}"
+
+class _KeyLocks:
+    """进程内按键分配的线程锁，无人使用时自动回收"""
+    
+    def __init__(self):
+        """初始化锁表"""
+        self._locks = {}  # key -> [锁, 引用计数]
+        self._lock = threading.Lock()
+    
+    def acquire(self, key: str) -> threading.Lock:
+        """获取键对应的锁"""
+        with self._lock:
+            item = self._locks.setdefault(key, [threading.Lock(), 0])
+            item[1] += 1
+        item[0].acquire()
+        return item[0]
+    
+    def release(self, key: str) -> None:
+        """释放键对应的锁"""
+        with self._lock:
+            item = self._locks[key]
+            item[1] -= 1
+            if item[1] == 0:
+                del self._locks[key]
+        item[0].release()
+
+def cached(ttl: Optional[float] = None,
+           manager: Optional[CacheManager] = None,
+           path_mode: str = "mtime") -> Callable:
+    """函数结果缓存装饰器
+    
+    缓存键由函数限定名和参数哈希生成，支持DataFrame、NumPy数组和Path参数
+    （path_mode为mtime时按修改时间和大小，为content时按文件内容）。
+    多个线程或进程同时未命中同一个键时只有一个执行计算，其余等待后直接读取结果。
+    支持协程函数。返回None的结果不会被缓存。
+    结果固定使用pickle序列化（沿用管理器的压缩算法），保证DataFrame、元组等类型原样返回。
+    """
+    def decorator(func: Callable) -> Callable:
+        key_locks = _KeyLocks()
+        
+        def get_manager() -> CacheManager:
+            """获取使用的缓存管理器，默认使用全局实例"""
+            return manager or cache_manager
+        
+        def result_codec(current: CacheManager) -> str:
+            """函数结果使用的编码"""
+            return make_codec("pickle", current.options.compression)
+        
+        def make_key(args: tuple, kwargs: dict) -> str:
+            """生成本次调用的缓存键"""
+            return make_cache_key(func, (args, kwargs), path_mode)
+        
+        def compute_locked(key: str, compute: Callable) -> Any:
+            """在线程锁和进程锁保护下再次检查缓存并计算"""
+            current = get_manager()
+            key_locks.acquire(key)
+            try:
+                with current.lock(key):
+                    value = current.get_cache(key, ttl)
+                    if value is None:
+                        value = compute()
+                        if value is not None:
+                            current.set_cache(key, value, result_codec(current))
+                    return value
+            finally:
+                key_locks.release(key)
+        
+        if inspect.iscoroutinefunction(func):
+            # 同一事件循环内正在计算的键 -> Future
+            inflight = {}
+            
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                key = make_key(args, kwargs)
+                loop = asyncio.get_running_loop()
+                current = get_manager()
+                
+                value = await loop.run_in_executor(None, current.get_cache, key, ttl)
+                if value is not None:
+                    return value
+                
+                # 同一事件循环内的并发调用等待同一个计算结果
+                inflight_key = (id(loop), key)
+                if inflight_key in inflight:
+                    return await asyncio.shield(inflight[inflight_key])
+                
+                future = loop.create_future()
+                inflight[inflight_key] = future
+                try:
+                    # 进程锁在线程池中获取，避免阻塞事件循环
+                    lock = current.lock(key)
+                    acquiring = loop.run_in_executor(None, lock.acquire)
+                    try:
+                        await asyncio.shield(acquiring)
+                    except asyncio.CancelledError:
+                        # 被取消时线程仍会拿到锁，拿到后立即释放
+                        acquiring.add_done_callback(
+                            lambda f: f.cancelled() or f.exception() or lock.release()
+                        )
+                        raise
+                    try:
+                        value = await loop.run_in_executor(None, current.get_cache, key, ttl)
+                        if value is None:
+                            value = await func(*args, **kwargs)
+                            if value is not None:
+                                await loop.run_in_executor(
+                                    None, current.set_cache, key, value, result_codec(current)
+                                )
+                    finally:
+                        lock.release()
+                    future.set_result(value)
+                    return value
+                except asyncio.CancelledError:
+                    future.cancel()
+                    raise
+                except Exception as e:
+                    future.set_exception(e)
+                    # 没有等待者时避免"exception was never retrieved"警告
+                    future.exception()
+                    raise
+                finally:
+                    del inflight[inflight_key]
+            
+            async_wrapper.cache_key = lambda *args, **kwargs: make_key(args, kwargs)
+            return async_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = make_key(args, kwargs)
+            value = get_manager().get_cache(key, ttl)
+            if value is not None:
+                return value
+            return compute_locked(key, lambda: func(*args, **kwargs))
+        
+        wrapper.cache_key = lambda *args, **kwargs: make_key(args, kwargs)
+        return wrapper
+    
+    return decorator
@@ -4,12 +4,74 @@
 提供数据清洗、转换、验证等功能
 """
 
+import os
+import sys
+import ast
+import bisect
+import random
+import functools
+import itertools
+import threading
+import multiprocessing
+import numpy as np
 import pandas as pd
-from typing import Any, Dict, List, Union, Optional
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from operator import eq, ne, gt, lt, ge, le
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Union, Optional
 from pathlib import Path
 
-def clean_data(data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """清洗数据，移除空值和无效数据"""
+# 数据集类型：字典列表、DataFrame或 列名 -> NumPy数组 的列式字典
+# 传入DataFrame或列式字典时使用向量化实现，并返回相同类型
+TableLike = Union[List[Dict[str, Any]], pd.DataFrame, Dict[str, np.ndarray]]
+
+# 比较操作符 -> 函数，同时适用于标量、pandas Series和NumPy数组
+COMPARE_OPERATORS = {"==": eq, "!=": ne, ">": gt, "<": lt, ">=": ge, "<=": le}
+
+def _is_columnar(data: Any) -> bool:
+    """判断是否为列式字典（所有值均为NumPy数组）"""
+    return isinstance(data, dict) and bool(data) and all(isinstance(v, np.ndarray) for v in data.values())
+
+def _frame_to_columns(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """将DataFrame转换为列式字典"""
+    return {column: df[column].to_numpy() for column in df.columns}
+
+def _take_columns(columns: Dict[str, np.ndarray], selector: np.ndarray) -> Dict[str, np.ndarray]:
+    """按布尔掩码或行号数组选取列式字典的行"""
+    return {name: values[selector] for name, values in columns.items()}
+
+def _as_frame(data: TableLike) -> pd.DataFrame:
+    """将任意数据集类型转换为DataFrame"""
+    if isinstance(data, pd.DataFrame):
+        return data
+    if _is_columnar(data):
+        return pd.DataFrame(data, copy=False)
+    return convert_to_dataframe(data)
+
+def _restore_type(df: pd.DataFrame, like: TableLike) -> TableLike:
+    """将DataFrame结果转换回与输入相同的数据集类型"""
+    if isinstance(like, pd.DataFrame):
+        return df
+    if _is_columnar(like):
+        return _frame_to_columns(df)
+    return dataframe_to_dict_list(df)
+
+def _clean_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """向量化清洗：空字符串视为空值，移除所有字段均为空的行"""
+    empty = df.isna()
+    for column in df.columns:
+        if pd.api.types.is_object_dtype(df[column]) or pd.api.types.is_string_dtype(df[column]):
+            empty[column] |= df[column].eq("").fillna(False).astype(bool)
+    
+    return df.mask(empty)[~empty.all(axis=1)]
+
+def clean_data(data: TableLike, workers: Optional[int] = None) -> TableLike:
+    """清洗数据，移除空值和无效数据；workers大于1时字典列表分块并行处理"""
+    if isinstance(data, pd.DataFrame) or _is_columnar(data):
+        return _restore_type(_clean_frame(_as_frame(data)), data)
+    if workers and workers > 1:
+        return _concat_chunks(parallel_map_chunks(clean_data, data, ParallelOptions(workers=workers)))
+    
     cleaned_data = []
     
     for item in data:
@@ -22,10 +84,19 @@ def clean_data(data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     
     return cleaned_data
 
-def validate_data(data: List[Dict[str, Any]], required_fields: List[str]) -> bool:
-    """验证数据是否包含必需字段"""
+def validate_data(data: TableLike, required_fields: List[str], workers: Optional[int] = None) -> bool:
+    """验证数据是否包含必需字段；workers大于1时字典列表分块并行验证"""
+    if isinstance(data, pd.DataFrame) or _is_columnar(data):
+        df = _as_frame(data)
+        if df.empty or any(field not in df.columns for field in required_fields):
+            return False
+        return not df[required_fields].isna().any().any()
+    
     if not data:
         return False
+    if workers and workers > 1:
+        check = functools.partial(validate_data, required_fields=required_fields)
+        return all(parallel_map_chunks(check, data, ParallelOptions(workers=workers)))
     
     for item in data:
         for field in required_fields:
@@ -48,11 +119,239 @@ def dataframe_to_dict_list(df: pd.DataFrame) -> List[Dict[str, Any]]:
     
     return df.to_dict('records')
 
-def filter_data(data: List[Dict[str, Any]], 
-                field: str, 
-                value: Any, 
-                operator: str = "==") -> List[Dict[str, Any]]:
-    """根据条件过滤数据"""
+# ==================== 复合查询 ====================
+# AST比较节点 -> 操作符
+_AST_OPERATORS = {
+    ast.Eq: "==", ast.NotEq: "!=", ast.Gt: ">", ast.Lt: "<", ast.GtE: ">=", ast.LtE: "<=",
+    ast.In: "in", ast.NotIn: "not in", ast.Is: "is", ast.IsNot: "is not",
+}
+
+class Query:
+    """复合查询条件，表达式只解析一次
+    
+    语法为Python表达式的子集：and/or/not、比较（支持18 <= 年龄 < 30这样的范围）、
+    in/not in、is None/is not None空值判断，例如：
+        "age > 25 and city in ('北京', '上海') and email is not None"
+    字典行通过编译后的单次遍历函数求值（and/or短路），DataFrame通过向量化布尔掩码求值。
+    字段缺失或为空值（None/NaN）的行不满足除空值判断以外的任何条件（包括!=和not in）。
+    """
+    
+    def __init__(self, expression: str):
+        """解析并编译查询表达式"""
+        self.expression = expression
+        try:
+            self._tree = ast.parse(expression.strip(), mode="eval").body
+        except SyntaxError as e:
+            raise ValueError(f"查询表达式语法错误: {expression}") from e
+        
+        self._constants = {}
+        self._temp_count = 0
+        self.source = self._compile_node(self._tree)
+        
+        # 同时生成逐行判断函数和整批过滤的列表推导，后者省去每行一次的函数调用
+        namespace = dict(self._constants)
+        exec(f"def predicate(row):\n    return {self.source}\n"
+             f"def select(rows):\n    return [row for row in rows if {self.source}]\n", namespace)
+        self.predicate = namespace["predicate"]
+        self.select = namespace["select"]
+    
+    def __call__(self, row: Dict[str, Any]) -> bool:
+        """判断单行是否满足条件"""
+        return self.predicate(row)
+    
+    def __repr__(self) -> str:
+        """显示原始表达式"""
+        return f"Query({self.expression!r})"
+    
+    def __reduce__(self) -> tuple:
+        """序列化时只保存表达式，反序列化时重新编译（编译出的函数无法pickle）"""
+        return (compile_query, (self.expression,))
+    
+    # ---------- 编译为Python函数 ----------
+    def _constant(self, node: ast.AST, membership: bool) -> str:
+        """将字面量绑定为函数的全局常量，in的集合转换为frozenset以便O(1)查找"""
+        try:
+            value = ast.literal_eval(node)
+        except ValueError:
+            raise ValueError(f"不支持的查询语法: {ast.unparse(node)}")
+        
+        if membership and isinstance(value, (list, tuple, set)):
+            try:
+                value = frozenset(value)
+            except TypeError:
+                value = tuple(value)
+        
+        name = f"_c{len(self._constants)}"
+        self._constants[name] = value
+        return name
+    
+    def _temp(self) -> str:
+        """分配一个临时变量名"""
+        self._temp_count += 1
+        return f"_v{self._temp_count - 1}"
+    
+    def _compile_null_check(self, node: ast.Compare, operator: str) -> Optional[str]:
+        """编译空值判断（field is None / field == None），缺失字段和NaN视为空值"""
+        right = node.comparators[0]
+        if len(node.ops) != 1 or not isinstance(node.left, ast.Name):
+            return None
+        if not (isinstance(right, ast.Constant) and right.value is None):
+            return None
+        # NaN是唯一不等于自身的值
+        var = self._temp()
+        if operator in ("is", "=="):
+            return f"(({var} := row.get({node.left.id!r})) is None or {var} != {var})"
+        if operator in ("is not", "!="):
+            return f"(({var} := row.get({node.left.id!r})) is not None and {var} == {var})"
+        return None
+    
+    def _compile_compare(self, node: ast.Compare) -> str:
+        """编译比较节点：先取出字段值并排除空值，再执行（可能是链式的）比较"""
+        operators = [_AST_OPERATORS[type(op)] for op in node.ops]
+        null_check = self._compile_null_check(node, operators[0])
+        if null_check is not None:
+            return null_check
+        if "is" in operators or "is not" in operators:
+            raise ValueError(f"is/is not只能用于与None比较: {ast.unparse(node)}")
+        
+        guards = []
+        codes = []
+        operands = [node.left] + node.comparators
+        for index, operand in enumerate(operands):
+            if isinstance(operand, ast.Name):
+                var = self._temp()
+                guards.append(f"({var} := row.get({operand.id!r})) is not None and {var} == {var}")
+                codes.append(var)
+            else:
+                membership = index > 0 and operators[index - 1] in ("in", "not in")
+                codes.append(self._constant(operand, membership))
+        
+        chain = codes[0] + "".join(f" {op} {code}" for op, code in zip(operators, codes[1:]))
+        return "(" + " and ".join(guards + [chain]) + ")"
+    
+    def _compile_node(self, node: ast.AST) -> str:
+        """将AST节点编译为Python源码片段"""
+        if isinstance(node, ast.BoolOp):
+            joiner = " and " if isinstance(node.op, ast.And) else " or "
+            return "(" + joiner.join(self._compile_node(value) for value in node.values) + ")"
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            return f"(not {self._compile_node(node.operand)})"
+        if isinstance(node, ast.Compare):
+            return self._compile_compare(node)
+        if isinstance(node, ast.Name):
+            return f"bool(row.get({node.id!r}))"
+        return f"bool({self._constant(node, False)})"
+    
+    # ---------- 向量化掩码 ----------
+    def _column(self, df: pd.DataFrame, node: ast.AST) -> Any:
+        """取出比较的操作数：字段返回Series（缺失字段为全空列），字面量返回常量"""
+        if isinstance(node, ast.Name):
+            if node.id in df.columns:
+                return df[node.id]
+            return pd.Series(None, index=df.index, dtype=object)
+        return ast.literal_eval(node)
+    
+    def _mask_compare(self, df: pd.DataFrame, node: ast.Compare) -> Any:
+        """计算比较节点的掩码，链式比较拆分为相邻两两比较的与"""
+        operands = [self._column(df, operand) for operand in [node.left] + node.comparators]
+        mask = pd.Series(True, index=df.index)
+        
+        for index, op in enumerate(node.ops):
+            operator = _AST_OPERATORS[type(op)]
+            left, right = operands[index], operands[index + 1]
+            if operator in ("is", "is not") or (operator in ("==", "!=") and right is None):
+                mask &= left.isna() if operator in ("is", "==") else left.notna()
+                continue
+            if not isinstance(left, pd.Series) and operator in ("in", "not in"):
+                raise ValueError(f"in的左侧必须是字段: {ast.unparse(node)}")
+            
+            mask &= _filter_mask(left, right, operator)
+            # 空值不满足任何比较，与逐行求值一致
+            for operand in (left, right):
+                if isinstance(operand, pd.Series):
+                    mask &= operand.notna()
+        
+        return mask
+    
+    def _mask_node(self, df: pd.DataFrame, node: ast.AST) -> Any:
+        """递归计算AST节点的布尔掩码"""
+        if isinstance(node, ast.BoolOp):
+            masks = [self._mask_node(df, value) for value in node.values]
+            return functools.reduce((lambda a, b: a & b) if isinstance(node.op, ast.And) else (lambda a, b: a | b), masks)
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            return ~self._mask_node(df, node.operand)
+        if isinstance(node, ast.Compare):
+            return self._mask_compare(df, node)
+        if isinstance(node, ast.Name):
+            column = self._column(df, node)
+            return column.fillna(False).astype(bool)
+        return pd.Series(bool(ast.literal_eval(node)), index=df.index)
+    
+    def mask(self, df: pd.DataFrame) -> np.ndarray:
+        """计算DataFrame的布尔掩码"""
+        mask = pd.Series(self._mask_node(df, self._tree), index=df.index)
+        return mask.fillna(False).astype(bool).to_numpy()
+
+@functools.lru_cache(maxsize=128)
+def compile_query(expression: str) -> Query:
+    """编译查询表达式，相同表达式复用编译结果"""
+    return Query(expression)
+
+def query_data(data: Union[TableLike, Iterable[Dict[str, Any]]],
+               expression: Union[str, Query],
+               limit: Optional[int] = None) -> TableLike:
+    """按复合查询条件过滤数据，limit为最多返回的行数，字典行达到limit后立即停止遍历
+    
+    data可以是字典列表、任意字典行的迭代器（如iter_csv的结果）、DataFrame或列式字典，返回对应的类型
+    （迭代器输入返回列表）。
+    """
+    query = compile_query(expression) if isinstance(expression, str) else expression
+    
+    if isinstance(data, pd.DataFrame):
+        result = data[query.mask(data)]
+        return result.head(limit) if limit is not None else result
+    if _is_columnar(data):
+        rows = np.flatnonzero(query.mask(pd.DataFrame(data, copy=False)))
+        return _take_columns(data, rows[:limit] if limit is not None else rows)
+    
+    if limit is None:
+        return query.select(data)
+    return list(itertools.islice(filter(query.predicate, data), limit))
+
+def _filter_mask(values: Any, value: Any, operator: str) -> Any:
+    """计算过滤条件的布尔掩码，values为pandas Series或NumPy数组"""
+    if operator in ("in", "not in"):
+        if isinstance(values, pd.Series):
+            mask = values.isin(list(value))
+        else:
+            mask = np.isin(values, list(value))
+        return ~mask if operator == "not in" else mask
+    
+    if operator not in COMPARE_OPERATORS:
+        return np.zeros(len(values), dtype=bool)
+    return COMPARE_OPERATORS[operator](values, value)
+
+def filter_data(data: TableLike, 
+                field: Union[str, Query], 
+                value: Any = None, 
+                operator: str = "==") -> TableLike:
+    """根据条件过滤数据，field也可以是compile_query编译的复合条件（此时忽略value和operator）"""
+    if isinstance(field, Query):
+        return query_data(data, field)
+    if isinstance(data, IndexedDataset):
+        positions = data.match_positions(field, value, operator)
+        if positions is not None:
+            return data.rows(positions)
+        data = data.data
+    if isinstance(data, pd.DataFrame):
+        if field not in data.columns:
+            return data.iloc[0:0]
+        return data[_filter_mask(data[field], value, operator)]
+    if _is_columnar(data):
+        if field not in data:
+            return _take_columns(data, np.zeros(len(next(iter(data.values()))), dtype=bool))
+        return _take_columns(data, np.asarray(_filter_mask(data[field], value, operator), dtype=bool))
+    
     filtered_data = []
     
     for item in data:
@@ -81,56 +380,205 @@ def filter_data(data: List[Dict[str, Any]],
     
     return filtered_data
 
-def sort_data(data: List[Dict[str, Any]], 
+def _stable_argsort(values: np.ndarray, reverse: bool) -> np.ndarray:
+    """稳定排序的行号，倒序时相同值仍保持原有顺序（与sorted(reverse=True)一致）"""
+    if not reverse:
+        return np.argsort(values, kind="stable")
+    return len(values) - 1 - np.argsort(values[::-1], kind="stable")[::-1]
+
+def sort_data(data: TableLike, 
               field: str, 
-              reverse: bool = False) -> List[Dict[str, Any]]:
+              reverse: bool = False) -> TableLike:
     """根据字段排序数据"""
+    if isinstance(data, pd.DataFrame):
+        if field not in data.columns:
+            return data
+        return data.sort_values(field, ascending=not reverse, kind="stable")
+    if _is_columnar(data):
+        if field not in data:
+            return data
+        return _take_columns(data, _stable_argsort(data[field], reverse))
+    
     if not data or field not in data[0]:
         return data
     
     return sorted(data, key=lambda x: x.get(field, ""), reverse=reverse)
 
-def get_unique_values(data: List[Dict[str, Any]], field: str) -> List[Any]:
-    """获取指定字段的唯一值"""
-    if not data or field not in data[0]:
-        return []
-    
+def _unique_set(data: List[Dict[str, Any]], field: str) -> set:
+    """收集字段的非空值集合"""
     unique_values = set()
     for item in data:
         if field in item and item[field] is not None:
             unique_values.add(item[field])
-    
-    return list(unique_values)
+    return unique_values
 
-def count_by_field(data: List[Dict[str, Any]], field: str) -> Dict[Any, int]:
-    """统计指定字段的值出现次数"""
+def get_unique_values(data: TableLike, field: str, workers: Optional[int] = None) -> List[Any]:
+    """获取指定字段的唯一值；workers大于1时字典列表分块并行收集后取并集"""
+    if isinstance(data, pd.DataFrame):
+        if field not in data.columns:
+            return []
+        return data[field].dropna().unique().tolist()
+    if _is_columnar(data):
+        if field not in data:
+            return []
+        values = data[field]
+        values = values[~pd.isna(values)]
+        try:
+            return np.unique(values).tolist()
+        except TypeError:
+            # 混合类型的object数组无法排序，改用哈希去重
+            return pd.unique(values).tolist()
+    
     if not data or field not in data[0]:
-        return {}
+        return []
+    if workers and workers > 1:
+        collect = functools.partial(_unique_set, field=field)
+        return list(set().union(*parallel_map_chunks(collect, data, ParallelOptions(workers=workers))))
     
+    return list(_unique_set(data, field))
+
+def _count_values(data: List[Dict[str, Any]], field: str) -> Dict[Any, int]:
+    """统计字段非空值的出现次数，键按首次出现的顺序排列"""
     count_dict = {}
     for item in data:
         if field in item and item[field] is not None:
             value = item[field]
             count_dict[value] = count_dict.get(value, 0) + 1
-    
     return count_dict
 
-def merge_data(data1: List[Dict[str, Any]], 
-               data2: List[Dict[str, Any]], 
-               key_field: str) -> List[Dict[str, Any]]:
-    """根据关键字段合并两个数据集"""
+def count_by_field(data: TableLike, field: str, workers: Optional[int] = None) -> Dict[Any, int]:
+    """统计指定字段的值出现次数；workers大于1时字典列表分块并行统计后按块顺序累加"""
+    if isinstance(data, pd.DataFrame) or _is_columnar(data):
+        if field not in data:
+            return {}
+        values = pd.Series(data[field], copy=False)
+        return values.value_counts(dropna=True, sort=False).to_dict()
+    
+    if not data or field not in data[0]:
+        return {}
+    if workers and workers > 1:
+        count_chunk = functools.partial(_count_values, field=field)
+        count_dict = {}
+        # 按块顺序累加，键的顺序与串行统计一致
+        for chunk_counts in parallel_map_chunks(count_chunk, data, ParallelOptions(workers=workers)):
+            for value, count in chunk_counts.items():
+                count_dict[value] = count_dict.get(value, 0) + count
+        return count_dict
+    
+    return _count_values(data, field)
+
+# 支持的连接方式
+JOIN_TYPES = ("left", "inner", "outer")
+
+@dataclass
+class MergeOptions:
+    """merge_data的连接选项"""
+    on: Union[str, List[str]]      # 关键字段，字段列表表示组合键
+    how: str = "left"              # left保留未匹配的左表行，inner只保留匹配行，outer另外追加未匹配的右表行
+    one_to_many: bool = False      # True时右表一个键匹配多行输出所有组合，False时重复键只保留最后一条
+
+def _merge_frames(left: pd.DataFrame, right: pd.DataFrame, options: MergeOptions) -> pd.DataFrame:
+    """向量化连接：匹配行用右表字段覆盖左表同名字段，行顺序与字典列表的结果一致"""
+    keys = _key_fields(options.on)
+    if any(key not in left.columns or key not in right.columns for key in keys):
+        # 缺少关键字段时没有匹配行
+        if options.how == "inner":
+            return left.iloc[0:0]
+        if options.how == "outer":
+            return pd.concat([left, right], ignore_index=True)
+        return left
+    
+    if not options.one_to_many:
+        right = right.drop_duplicates(keys, keep="last")
+    how = "inner" if options.how == "inner" else "left"
+    merged = left.merge(right, on=keys, how=how, suffixes=("", "__right"), indicator=True)
+    matched = (merged["_merge"] == "both").to_numpy()
+    
+    for column in right.columns:
+        if column not in keys and column in left.columns:
+            merged[column] = merged[f"{column}__right"].where(matched, merged[column])
+            merged = merged.drop(columns=f"{column}__right")
+    merged = merged.drop(columns="_merge")
+    
+    if options.how == "left" and not options.one_to_many:
+        merged.index = left.index
+        return merged
+    
+    merged = merged.reset_index(drop=True)
+    if options.how == "outer":
+        # 未匹配的右表行追加在末尾（pandas的outer连接会按键重新排序）
+        unmatched = right.merge(left[list(keys)].drop_duplicates(), on=list(keys), how="left", indicator=True)
+        unmatched = unmatched[unmatched["_merge"] == "left_only"].drop(columns="_merge")
+        merged = pd.concat([merged, unmatched], ignore_index=True)
+    return merged
+
+def merge_data(data1: TableLike, 
+               data2: Union[TableLike, "IndexedDataset"], 
+               key_field: Union[str, List[str], MergeOptions]) -> TableLike:
+    """根据关键字段合并两个数据集，key_field为字段列表时按组合键匹配
+    
+    默认为左连接，data2中的重复键只保留最后一条；key_field传入MergeOptions时可指定连接方式
+    （left/inner/outer）和一对多匹配，例如MergeOptions("用户ID", how="inner", one_to_many=True)。
+    data2为IndexedDataset时复用（或首次建立并缓存）其关键字段索引，不再每次重建查找字典。
+    两个数据集的类型可以不同，结果与data1的类型相同。
+    """
+    options = key_field if isinstance(key_field, MergeOptions) else MergeOptions(key_field)
+    if options.how not in JOIN_TYPES:
+        raise ValueError(f"不支持的连接方式: {options.how}")
+    key_field = options.on
+    
+    if isinstance(data1, pd.DataFrame) or _is_columnar(data1):
+        left = _as_frame(data1)
+        right = _as_frame(data2.data if isinstance(data2, IndexedDataset) else data2)
+        if options.how == "inner" and (left.empty or right.empty):
+            return _restore_type(left.iloc[0:0], data1)
+        if left.empty or right.empty:
+            return data1 if not left.empty else _restore_type(right, data1)
+        return _restore_type(_merge_frames(left, right, options), data1)
+    
+    # data1为字典列表时将DataFrame/列式字典转换为字典列表，按字典列表的规则合并
+    if isinstance(data2, pd.DataFrame) or _is_columnar(data2):
+        data2 = dataframe_to_dict_list(_as_frame(data2))
+    
+    # 指定了inner/outer或一对多匹配时按索引连接
+    if options.how != "left" or options.one_to_many:
+        if not isinstance(data2, IndexedDataset):
+            data2 = IndexedDataset(data2 or [])
+        right = data2
+        if not options.one_to_many:
+            right = IndexedDataset(_dedupe_rows(data2.data, _key_fields(key_field)))
+        return _join_rows(data1 or [], right, right.add_index(key_field), options.how)
+    
+    if isinstance(data2, IndexedDataset):
+        if not data1 or not data2:
+            return data1 or data2.data
+        index = data2.add_index(key_field)
+        get_key = _key_getter(index.fields)
+        
+        merged_data = []
+        for item1 in data1:
+            positions = index.lookup(get_key(item1))
+            # 重复键时与查找字典一致，使用最后一条
+            merged_data.append({**item1, **data2.data[positions[-1]]} if positions else item1)
+        return merged_data
+    
     if not data1 or not data2:
         return data1 or data2
     
     # 创建第二个数据的查找字典
-    data2_dict = {item[key_field]: item for item in data2 
-                  if key_field in item}
+    get_key = _key_getter(_key_fields(key_field))
+    data2_dict = {}
+    for item in data2:
+        key = get_key(item)
+        if key is not _NO_KEY:
+            data2_dict[key] = item
     
     merged_data = []
     for item1 in data1:
-        if key_field in item1 and item1[key_field] in data2_dict:
+        key = get_key(item1)
+        if key is not _NO_KEY and key in data2_dict:
             # 合并数据，data2的字段会覆盖data1的同名字段
-            merged_item = {**item1, **data2_dict[item1[key_field]]}
+            merged_item = {**item1, **data2_dict[key]}
             merged_data.append(merged_item)
         else:
             merged_data.append(item1)
@@ -163,4 +611,540 @@ def split_data(data: List[Dict[str, Any]],
     train_data = data[:split_index]
     test_data = data[split_index:]
     
-    return train_data, test_data 
\ No newline at end of file
+    return train_data, test_data 
+
+# ==================== 惰性流水线 ====================
+def _clean_row(item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """清洗单行，与clean_data规则一致，清洗后为空时返回None"""
+    cleaned_item = {k: v for k, v in item.items() if v is not None and v != ""}
+    return cleaned_item or None
+
+def _row_condition(field: str, value: Any, operator: str) -> Callable[[Dict[str, Any]], bool]:
+    """构造与filter_data规则一致的单行判断函数"""
+    if operator == "in":
+        return lambda item: field in item and item[field] in value
+    if operator == "not in":
+        return lambda item: field in item and item[field] not in value
+    if operator not in COMPARE_OPERATORS:
+        return lambda item: False
+    
+    compare = COMPARE_OPERATORS[operator]
+    return lambda item: field in item and compare(item[field], value)
+
+def _run_row_steps(rows: Iterable[Dict[str, Any]], steps: List[tuple]) -> Iterator[Dict[str, Any]]:
+    """在一次遍历中依次执行所有逐行步骤（过滤或变换），变换返回None表示丢弃该行"""
+    for row in rows:
+        for is_filter, func in steps:
+            if is_filter:
+                if not func(row):
+                    break
+            else:
+                row = func(row)
+                if row is None:
+                    break
+        else:
+            yield row
+
+class Pipeline:
+    """惰性数据流水线，链式组合data_utils的操作，直到取结果时才执行
+    
+    相邻的逐行步骤（clean/filter/where/map/select/merge）合并为一次遍历，
+    只有sort这类阻塞步骤才会物化数据；不含阻塞步骤的流水线内存占用与数据量无关。
+    每个方法返回新的Pipeline，原流水线不变。用法：
+        result = (Pipeline.from_csv(DATA_DIR / "users.csv")
+                  .clean()
+                  .where("age > 25")
+                  .sort("age")
+                  .limit(100)
+                  .collect())
+    source为可迭代对象或返回迭代器的无参函数；传入一次性迭代器时流水线只能执行一次。
+    """
+    
+    def __init__(self, source: Union[Iterable[Dict[str, Any]], Callable[[], Iterable[Dict[str, Any]]]],
+                 stages: Optional[List[tuple]] = None):
+        """创建流水线，stages为内部使用的阶段列表"""
+        self._source = source
+        self._stages = stages or []
+    
+    @classmethod
+    def from_csv(cls, file_path: Union[str, Path]) -> "Pipeline":
+        """以流式CSV读取为数据源，每次执行重新读取文件"""
+        from utils.file_utils import iter_csv
+        return cls(lambda: iter_csv(file_path))
+    
+    @classmethod
+    def from_jsonl(cls, file_path: Union[str, Path]) -> "Pipeline":
+        """以JSON Lines文件为数据源，每次执行重新读取文件"""
+        from utils.file_utils import iter_jsonl
+        return cls(lambda: iter_jsonl(file_path))
+    
+    # ---------- 构建 ----------
+    def _add_row_step(self, is_filter: bool, func: Callable) -> "Pipeline":
+        """追加逐行步骤，与前面相邻的逐行步骤合并到同一阶段"""
+        stages = list(self._stages)
+        if stages and stages[-1][0] == "rows":
+            stages[-1] = ("rows", stages[-1][1] + [(is_filter, func)])
+        else:
+            stages.append(("rows", [(is_filter, func)]))
+        return Pipeline(self._source, stages)
+    
+    def _add_stage(self, func: Callable[[Iterator[Dict[str, Any]]], Iterable[Dict[str, Any]]]) -> "Pipeline":
+        """追加作用于整个行迭代器的阶段"""
+        return Pipeline(self._source, self._stages + [("iter", func)])
+    
+    def clean(self) -> "Pipeline":
+        """逐行清洗，规则同clean_data"""
+        return self._add_row_step(False, _clean_row)
+    
+    def filter(self, field: Union[str, Query], value: Any = None, operator: str = "==") -> "Pipeline":
+        """按条件过滤，参数同filter_data"""
+        if isinstance(field, Query):
+            return self._add_row_step(True, field.predicate)
+        return self._add_row_step(True, _row_condition(field, value, operator))
+    
+    def where(self, expression: Union[str, Query]) -> "Pipeline":
+        """按复合查询表达式过滤，语法同compile_query"""
+        query = compile_query(expression) if isinstance(expression, str) else expression
+        return self._add_row_step(True, query.predicate)
+    
+    def map(self, func: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]) -> "Pipeline":
+        """逐行变换，func返回None时丢弃该行"""
+        return self._add_row_step(False, func)
+    
+    def select(self, fields: List[str]) -> "Pipeline":
+        """只保留指定字段"""
+        fields = list(fields)
+        return self._add_row_step(False, lambda row: {field: row[field] for field in fields if field in row})
+    
+    def merge(self, other: Iterable[Dict[str, Any]], key_field: str) -> "Pipeline":
+        """与另一数据集按关键字段左连接，规则同merge_data
+        
+        只在首次执行时物化右侧数据建立查找字典，左侧仍逐行流式处理。
+        """
+        lookup = {}
+        
+        def merge_row(row: Dict[str, Any]) -> Dict[str, Any]:
+            """合并单行，右侧重复键保留最后一条"""
+            if not lookup.get("built"):
+                lookup["index"] = {item[key_field]: item for item in other if key_field in item}
+                lookup["built"] = True
+            if key_field in row and row[key_field] in lookup["index"]:
+                return {**row, **lookup["index"][row[key_field]]}
+            return row
+        
+        return self._add_row_step(False, merge_row)
+    
+    def sort(self, field: str, reverse: bool = False) -> "Pipeline":
+        """排序（阻塞步骤，会物化前面的所有数据），规则同sort_data"""
+        return self._add_stage(lambda rows: sort_data(list(rows), field, reverse))
+    
+    def sample(self, sample_size: int, random_seed: Optional[int] = None) -> "Pipeline":
+        """蓄水池随机采样，只保存sample_size行；结果与sample_data不保证相同"""
+        def reservoir(rows: Iterator[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            """对行流做蓄水池采样"""
+            rng = random.Random(random_seed)
+            sampled = []
+            for index, row in enumerate(rows):
+                if index < sample_size:
+                    sampled.append(row)
+                else:
+                    slot = rng.randint(0, index)
+                    if slot < sample_size:
+                        sampled[slot] = row
+            return sampled
+        
+        return self._add_stage(reservoir)
+    
+    def limit(self, count: int) -> "Pipeline":
+        """只取前count行，取满后停止读取数据源"""
+        return self._add_stage(lambda rows: itertools.islice(rows, count))
+    
+    # ---------- 执行 ----------
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """执行流水线，逐行返回结果"""
+        rows = self._source() if callable(self._source) else self._source
+        rows = iter(rows)
+        for kind, stage in self._stages:
+            if kind == "rows":
+                rows = _run_row_steps(rows, stage)
+            else:
+                rows = iter(stage(rows))
+        return rows
+    
+    def collect(self) -> List[Dict[str, Any]]:
+        """执行流水线并返回字典列表"""
+        return list(self)
+    
+    def to_frame(self) -> pd.DataFrame:
+        """执行流水线并返回DataFrame"""
+        return convert_to_dataframe(self.collect())
+    
+    def count(self) -> int:
+        """统计结果行数（不保存数据）"""
+        return sum(1 for _ in self)
+    
+    def count_by(self, field: str) -> Dict[Any, int]:
+        """流式统计字段值出现次数，忽略缺失和None"""
+        count_dict = {}
+        for item in self:
+            value = item.get(field)
+            if value is not None:
+                count_dict[value] = count_dict.get(value, 0) + 1
+        return count_dict
+    
+    def unique(self, field: str) -> List[Any]:
+        """流式获取字段的唯一值，忽略缺失和None"""
+        return list({item[field] for item in self if item.get(field) is not None})
+    
+    def validate(self, required_fields: List[str]) -> bool:
+        """验证所有结果行都包含必需字段，遇到第一条不合格的行即停止"""
+        empty = True
+        for item in self:
+            empty = False
+            if any(item.get(field) is None for field in required_fields):
+                return False
+        return not empty
+    
+    def write_csv(self, file_path: Union[str, Path]) -> int:
+        """将结果流式写入CSV文件，返回写入的行数"""
+        from utils.file_utils import CsvWriter
+        with CsvWriter(file_path) as writer:
+            writer.write_rows(self)
+        return writer.rows_written
+    
+    def write_jsonl(self, file_path: Union[str, Path]) -> int:
+        """将结果流式写入JSON Lines文件，返回写入的行数"""
+        from utils.file_utils import write_jsonl
+        return write_jsonl(self, file_path)
+
+
+# ==================== 并行分块执行 ====================
+@dataclass
+class ParallelOptions:
+    """分块并行执行的可选配置"""
+    workers: Optional[int] = None      # 进程数，None时为CPU核数
+    chunk_size: Optional[int] = None   # 每块行数，None时按进程数的4倍均分
+
+# fork模式下由子进程继承的任务数据，子进程按行号范围切片，避免pickle整个数据块
+_SHARED_TASK = {}
+_SHARED_TASK_LOCK = threading.Lock()
+
+def _mark_worker() -> None:
+    """进程池初始化：标记当前进程为分块执行的工作进程"""
+    _SHARED_TASK["worker"] = True
+
+def _run_shared_chunk(bounds: tuple) -> Any:
+    """在fork出的子进程中处理[start, end)范围的数据"""
+    start, end = bounds
+    return _SHARED_TASK["func"](_SHARED_TASK["data"][start:end])
+
+def _concat_chunks(chunk_results: List[List[Any]]) -> List[Any]:
+    """按顺序拼接各块返回的列表"""
+    return list(itertools.chain.from_iterable(chunk_results))
+
+def parallel_map_chunks(func: Callable[[List[Any]], Any],
+                        data: Iterable[Any],
+                        options: Optional[ParallelOptions] = None) -> List[Any]:
+    """将数据按行切分为连续的块，在进程池中对每块执行func，按块顺序返回结果列表
+    
+    Linux上使用fork启动子进程，数据由子进程继承，只传递行号范围和各块结果；
+    其他平台（macOS虽支持fork但在多线程进程中不安全）按块pickle数据，此时func必须是模块级函数或其functools.partial。
+    数据量不足两块或只有一个进程时直接在当前进程执行；在工作进程中嵌套调用（如func内部再使用workers）
+    时也直接执行，避免子进程继承到已持有的共享任务锁而死锁。
+    """
+    options = options or ParallelOptions()
+    workers = options.workers or os.cpu_count() or 1
+    data = data if isinstance(data, list) else list(data)
+    
+    total = len(data)
+    chunk_size = options.chunk_size or max(1, -(-total // (workers * 4)))
+    bounds = [(start, min(start + chunk_size, total)) for start in range(0, total, chunk_size)]
+    
+    # fork时若有其他线程正持有锁，子进程中的共享任务记录的是父进程的pid
+    nested = _SHARED_TASK.get("worker") or _SHARED_TASK.get("pid", os.getpid()) != os.getpid()
+    if workers <= 1 or len(bounds) <= 1 or nested:
+        return [func(data[start:end]) for start, end in bounds]
+    
+    max_workers = min(workers, len(bounds))
+    if sys.platform.startswith("linux"):
+        with _SHARED_TASK_LOCK:
+            _SHARED_TASK.update(func=func, data=data, pid=os.getpid())
+            try:
+                with ProcessPoolExecutor(max_workers=max_workers, initializer=_mark_worker,
+                                         mp_context=multiprocessing.get_context("fork")) as executor:
+                    return list(executor.map(_run_shared_chunk, bounds))
+            finally:
+                _SHARED_TASK.clear()
+    
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_mark_worker) as executor:
+        return list(executor.map(func, (data[start:end] for start, end in bounds)))
+
+def parallel_filter(data: List[Dict[str, Any]],
+                    condition: Union[str, Query, tuple],
+                    options: Optional[ParallelOptions] = None) -> List[Dict[str, Any]]:
+    """分块并行过滤字典列表，结果保持原有顺序
+    
+    condition为查询表达式、compile_query编译的查询，或(field, value, operator)元组（规则同filter_data）。
+    """
+    if isinstance(condition, tuple):
+        field, value, *operator = condition
+        func = functools.partial(filter_data, field=field, value=value, operator=operator[0] if operator else "==")
+    else:
+        func = functools.partial(query_data, expression=condition)
+    
+    return _concat_chunks(parallel_map_chunks(func, data, options))
+
+
+# ==================== 索引 ====================
+# 行中缺少索引字段时的键占位值
+_NO_KEY = object()
+
+def _key_fields(fields: Union[str, List[str], tuple]) -> tuple:
+    """将单个字段或字段列表规范为字段元组"""
+    return (fields,) if isinstance(fields, str) else tuple(fields)
+
+def _key_getter(fields: tuple) -> Callable[[Dict[str, Any]], Any]:
+    """构造取键函数：单字段返回字段值，组合键返回值元组，缺少字段时返回_NO_KEY"""
+    if len(fields) == 1:
+        field = fields[0]
+        return lambda row: row[field] if field in row else _NO_KEY
+    return lambda row: tuple(row[field] for field in fields) if all(field in row for field in fields) else _NO_KEY
+
+class Index:
+    """字段索引：哈希索引支持等值查找（一个键对应多行），可选的有序索引支持范围查询
+    
+    索引保存行号而不是行本身；行号按数据中的顺序排列，查询结果保持原有顺序。
+    缺少索引字段的行不进入索引，与filter_data跳过缺失字段的规则一致。
+    """
+    
+    def __init__(self, data: List[Dict[str, Any]], fields: Union[str, List[str]], sorted_index: bool = False):
+        """为数据建立哈希索引，sorted_index为True时同时建立有序索引（跳过含None的键）"""
+        self.fields = _key_fields(fields)
+        self._buckets = {}
+        self._sorted_keys = None
+        self._sorted_positions = None
+        
+        get_key = _key_getter(self.fields)
+        for position, row in enumerate(data):
+            key = get_key(row)
+            if key is not _NO_KEY:
+                self._buckets.setdefault(key, []).append(position)
+        
+        if sorted_index:
+            self._build_sorted()
+    
+    def _build_sorted(self) -> None:
+        """按键排序建立有序索引"""
+        pairs = []
+        for key, positions in self._buckets.items():
+            if key is None or (isinstance(key, tuple) and None in key):
+                continue
+            pairs.extend((key, position) for position in positions)
+        
+        try:
+            pairs.sort()
+        except TypeError as e:
+            raise ValueError(f"字段{self.fields}的值类型不一致，无法建立有序索引: {e}")
+        
+        self._sorted_keys = [key for key, _ in pairs]
+        self._sorted_positions = [position for _, position in pairs]
+    
+    @property
+    def has_sorted(self) -> bool:
+        """是否建立了有序索引"""
+        return self._sorted_keys is not None
+    
+    def keys(self) -> List[Any]:
+        """所有不同的键，按首次出现的顺序排列"""
+        return list(self._buckets)
+    
+    def lookup(self, key: Any) -> List[int]:
+        """等值查找，返回行号列表（组合键传入元组）"""
+        try:
+            return self._buckets.get(key, [])
+        except TypeError:
+            # 不可哈希的值不可能在索引中
+            return []
+    
+    def lookup_many(self, keys: Iterable[Any]) -> List[int]:
+        """多值查找（in），返回按数据顺序排列的行号"""
+        seen = set()
+        positions = []
+        for key in keys:
+            try:
+                if key in seen:
+                    continue
+                seen.add(key)
+            except TypeError:
+                # 不可哈希的值不可能在索引中
+                continue
+            positions.extend(self.lookup(key))
+        return sorted(positions)
+    
+    def compare(self, operator: str, value: Any) -> List[int]:
+        """范围查找（> < >= <=），需要有序索引，返回按数据顺序排列的行号"""
+        if not self.has_sorted:
+            raise ValueError(f"字段{self.fields}未建立有序索引")
+        
+        keys = self._sorted_keys
+        if operator == ">":
+            selected = self._sorted_positions[bisect.bisect_right(keys, value):]
+        elif operator == ">=":
+            selected = self._sorted_positions[bisect.bisect_left(keys, value):]
+        elif operator == "<":
+            selected = self._sorted_positions[:bisect.bisect_left(keys, value)]
+        elif operator == "<=":
+            selected = self._sorted_positions[:bisect.bisect_right(keys, value)]
+        else:
+            raise ValueError(f"不支持的范围操作符: {operator}")
+        return sorted(selected)
+    
+    def range(self, low: Any = None, high: Any = None) -> List[int]:
+        """闭区间[low, high]查找，None表示不限，返回按数据顺序排列的行号"""
+        if not self.has_sorted:
+            raise ValueError(f"字段{self.fields}未建立有序索引")
+        
+        start = bisect.bisect_left(self._sorted_keys, low) if low is not None else 0
+        end = bisect.bisect_right(self._sorted_keys, high) if high is not None else len(self._sorted_keys)
+        return sorted(self._sorted_positions[start:end])
+    
+    def __len__(self) -> int:
+        """不同键的数量"""
+        return len(self._buckets)
+
+def _join_rows(left: Iterable[Dict[str, Any]], right: "IndexedDataset", index: Index, how: str) -> List[Dict[str, Any]]:
+    """按右表索引连接左表行，一个键匹配多行时输出所有组合（IndexedDataset.join和merge_data共用）"""
+    get_key = _key_getter(index.fields)
+    matched = set()
+    
+    joined = []
+    for left_row in left:
+        key = get_key(left_row)
+        positions = index.lookup(key) if key is not _NO_KEY else []
+        if positions:
+            joined.extend({**left_row, **right.data[position]} for position in positions)
+            if how == "outer":
+                matched.update(positions)
+        elif how != "inner":
+            joined.append(left_row)
+    
+    if how == "outer":
+        joined.extend(row for position, row in enumerate(right.data) if position not in matched)
+    return joined
+
+def _dedupe_rows(rows: List[Dict[str, Any]], fields: tuple) -> List[Dict[str, Any]]:
+    """重复键只保留最后一行（缺少关键字段的行全部保留），保持原有顺序"""
+    get_key = _key_getter(fields)
+    last = {}
+    for position, row in enumerate(rows):
+        key = get_key(row)
+        last[position if key is _NO_KEY else (_NO_KEY, key)] = position
+    return [rows[position] for position in sorted(last.values())]
+
+class IndexedDataset:
+    """带索引的字典列表，索引建立一次后可被多次查找、filter_data、merge_data和group_by复用
+    
+    数据在建立索引后视为只读；修改data后需重新创建IndexedDataset。用法：
+        users = IndexedDataset(read_csv(path), ["id", ("城市", "区县")])
+        users.add_index("年龄", sorted_index=True)
+        filter_data(users, "年龄", 30, ">=")    # 使用有序索引
+        merge_data(orders, users, "id")          # 使用id的哈希索引
+    """
+    
+    def __init__(self, data: Iterable[Dict[str, Any]], index_fields: Optional[List[Any]] = None):
+        """保存数据，并为index_fields中的每个字段（或字段元组）建立哈希索引"""
+        self.data = data if isinstance(data, list) else list(data)
+        self._indexes = {}
+        for fields in index_fields or []:
+            self.add_index(fields)
+    
+    def add_index(self, fields: Union[str, List[str]], sorted_index: bool = False) -> Index:
+        """建立索引，已存在满足要求的索引时直接返回"""
+        key = _key_fields(fields)
+        index = self._indexes.get(key)
+        if index is None:
+            index = self._indexes[key] = Index(self.data, key, sorted_index)
+        elif sorted_index and not index.has_sorted:
+            index._build_sorted()
+        return index
+    
+    def get_index(self, fields: Union[str, List[str]]) -> Optional[Index]:
+        """获取已建立的索引，不存在时返回None"""
+        return self._indexes.get(_key_fields(fields))
+    
+    def rows(self, positions: Iterable[int]) -> List[Dict[str, Any]]:
+        """按行号取出行"""
+        data = self.data
+        return [data[position] for position in positions]
+    
+    def lookup(self, fields: Union[str, List[str]], key: Any) -> List[Dict[str, Any]]:
+        """等值查找，字段尚未建立索引时自动建立并缓存"""
+        return self.rows(self.add_index(fields).lookup(key))
+    
+    def match_positions(self, field: str, value: Any, operator: str) -> Optional[List[int]]:
+        """用已有索引计算filter_data条件的行号，没有可用索引时返回None"""
+        index = self.get_index(field)
+        if index is None:
+            return None
+        if operator == "==":
+            return index.lookup(value)
+        if operator == "in":
+            return index.lookup_many(value)
+        if operator in (">", "<", ">=", "<=") and index.has_sorted:
+            return index.compare(operator, value)
+        return None
+    
+    def join(self, left: Iterable[Dict[str, Any]], on: Union[str, List[str]], how: str = "left") -> List[Dict[str, Any]]:
+        """以本数据集为右表与left按关键字段连接，一个键匹配多行时输出所有组合
+        
+        how为left（保留未匹配的左表行）、inner（只保留匹配行）或outer（另外追加未匹配的右表行）；
+        匹配行中右表字段覆盖左表同名字段，与merge_data一致。
+        """
+        if how not in JOIN_TYPES:
+            raise ValueError(f"不支持的连接方式: {how}")
+        return _join_rows(left, self, self.add_index(on), how)
+    
+    def __len__(self) -> int:
+        """行数"""
+        return len(self.data)
+    
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """遍历行"""
+        return iter(self.data)
+    
+    def __getitem__(self, position: int) -> Dict[str, Any]:
+        """按行号取行"""
+        return self.data[position]
+
+def group_by(data: Union[TableLike, IndexedDataset],
+             fields: Union[str, List[str]],
+             aggregate: Optional[Callable[[Any], Any]] = None) -> Dict[Any, Any]:
+    """按字段（或组合键）分组，返回 键 -> 行列表，aggregate不为None时返回 键 -> aggregate(行列表)
+    
+    键按首次出现的顺序排列，缺少分组字段或值为None的行不参与分组（与count_by_field一致）。
+    IndexedDataset已有对应索引时直接由索引生成分组；DataFrame按groupby分组，每组为子DataFrame。
+    """
+    keys = _key_fields(fields)
+    
+    if isinstance(data, pd.DataFrame) or _is_columnar(data):
+        df = _as_frame(data)
+        if any(key not in df.columns for key in keys):
+            return {}
+        by = keys[0] if len(keys) == 1 else list(keys)
+        groups = {key: _restore_type(group, data) for key, group in df.groupby(by, sort=False, dropna=True)}
+    elif isinstance(data, IndexedDataset) and data.get_index(keys) is not None:
+        index = data.get_index(keys)
+        groups = {key: data.rows(index.lookup(key)) for key in index.keys()
+                  if key is not None and not (isinstance(key, tuple) and None in key)}
+    else:
+        get_key = _key_getter(keys)
+        groups = {}
+        for row in data:
+            key = get_key(row)
+            if key is _NO_KEY or key is None or (isinstance(key, tuple) and None in key):
+                continue
+            groups.setdefault(key, []).append(row)
+    
+    if aggregate is not None:
+        return {key: aggregate(rows) for key, rows in groups.items()}
+    return groups
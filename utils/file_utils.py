@@ -4,11 +4,274 @@
 提供文件读写、路径处理等功能
 """
 
+import io
 import os
+import re
+import bz2
+import glob
+import gzip
 import json
+import fnmatch
+import hashlib
 import csv
+import lzma
+import mmap
+import pickle
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Union
+from typing import IO, Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+from config import (
+    CACHE_DIR, DATA_DIR, FILE_ATOMIC_WRITE, FILE_COMPRESSION_LEVEL, FILE_FSYNC, SUPPORTED_DATA_FORMATS
+)
+
+# 可选的高性能JSON库，未安装时使用标准库json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+# 可选的xxhash库，用于更快的文件内容哈希，未安装时使用blake2b
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# 可选的zstd压缩库，未安装时无法读写.zst文件
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 流式读写使用的文件缓冲区大小
+STREAM_BUFFER_SIZE = 1024 * 1024
+
+# 进程的umask，原子写入时据此设置新文件权限（与直接open创建的文件一致）
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+# ==================== 压缩文件 ====================
+# 压缩扩展名 -> 压缩算法
+COMPRESSION_EXTENSIONS = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'xz', '.zst': 'zstd'}
+
+# 文件头魔数 -> 压缩算法，读取时优先按魔数判断
+# bz2需匹配完整文件头（"BZh"+块大小+块魔数或空流的结束魔数），避免以"BZh"开头的文本被误判
+COMPRESSION_MAGIC = [
+    (re.compile(rb'\x1f\x8b'), 'gzip'),
+    (re.compile(rb'BZh[1-9](?:\x31\x41\x59\x26\x53\x59|\x17\x72\x45\x38\x50\x90)'), 'bz2'),
+    (re.compile(rb'\xfd7zXZ\x00'), 'xz'),
+    (re.compile(rb'\x28\xb5\x2f\xfd'), 'zstd'),
+]
+
+def detect_compression(file_path: Union[str, Path], mode: str = 'r') -> Optional[str]:
+    """检测文件的压缩算法，读取时按文件头魔数判断，写入时按扩展名判断，未压缩返回None"""
+    file_path = Path(file_path)
+    
+    if 'r' in mode:
+        with open(file_path, 'rb') as f:
+            head = f.read(10)
+        for magic, compression in COMPRESSION_MAGIC:
+            if magic.match(head):
+                return compression
+        return None
+    
+    return COMPRESSION_EXTENSIONS.get(file_path.suffix.lower())
+
+def _open_zstd(file_path: Path, mode: str, level: Optional[int]) -> IO[bytes]:
+    """以流式方式打开zstd文件，追加写入时生成新的帧，读取时跨帧连续解压"""
+    if zstandard is None:
+        raise ImportError("缺少可选依赖 zstandard，请先安装: pip install zstandard")
+    
+    raw = open(file_path, mode)
+    if 'r' in mode:
+        reader = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True)
+        return io.BufferedReader(reader, STREAM_BUFFER_SIZE)
+    
+    writer = zstandard.ZstdCompressor(level=level if level is not None else 3).stream_writer(raw, closefd=True)
+    return io.BufferedWriter(writer, STREAM_BUFFER_SIZE)
+
+def open_file(file_path: Union[str, Path], mode: str = 'rb', level: Optional[int] = None) -> IO[bytes]:
+    """以二进制模式打开文件，自动识别gzip/bz2/xz/zstd压缩并流式解压或压缩
+    
+    mode为'rb'、'wb'或'ab'；level为写入时的压缩级别，None时使用FILE_COMPRESSION_LEVEL或算法默认值。
+    解压按块进行，内存占用与文件大小无关。
+    """
+    file_path = Path(file_path)
+    mode = mode.replace('b', '') + 'b'
+    compression = detect_compression(file_path, mode)
+    if level is None:
+        level = FILE_COMPRESSION_LEVEL
+    
+    if compression == 'gzip':
+        return gzip.open(file_path, mode, compresslevel=level if level is not None else 6)
+    if compression == 'bz2':
+        return bz2.open(file_path, mode, compresslevel=level if level is not None else 9)
+    if compression == 'xz':
+        return lzma.open(file_path, mode, preset=level if 'r' not in mode else None)
+    if compression == 'zstd':
+        return _open_zstd(file_path, mode, level)
+    
+    return open(file_path, mode, buffering=STREAM_BUFFER_SIZE)
+
+def open_text(file_path: Union[str, Path], mode: str = 'r', newline: Optional[str] = None) -> IO[str]:
+    """以UTF-8文本模式打开文件，压缩文件的处理同open_file"""
+    file_path = Path(file_path)
+    if detect_compression(file_path, mode) is None:
+        return open(file_path, mode, encoding='utf-8', newline=newline, buffering=STREAM_BUFFER_SIZE)
+    
+    return io.TextIOWrapper(open_file(file_path, mode), encoding='utf-8', newline=newline)
+
+def get_data_extension(file_path: Union[str, Path]) -> str:
+    """获取去掉压缩扩展名后的数据格式扩展名，如data.csv.gz返回.csv"""
+    suffixes = [suffix.lower() for suffix in Path(file_path).suffixes]
+    if suffixes and suffixes[-1] in COMPRESSION_EXTENSIONS:
+        suffixes.pop()
+    return suffixes[-1] if suffixes else ''
+
+# ==================== 原子写入 ====================
+def _fsync_path(path: Union[str, Path], directory: bool = False) -> None:
+    """将文件或目录项刷到磁盘，Windows不支持打开目录时忽略"""
+    flags = os.O_RDONLY
+    if directory:
+        flags |= getattr(os, 'O_DIRECTORY', 0)
+    try:
+        fd = os.open(path, flags)
+    except OSError:
+        if directory:
+            return
+        raise
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+@contextmanager
+def atomic_path(file_path: Union[str, Path], fsync: Optional[bool] = None) -> Iterator[Path]:
+    """原子写入：返回目标文件同目录下的临时文件路径，上下文正常退出后用os.replace替换目标文件
+    
+    读者只会看到旧文件或完整的新文件；异常退出时删除临时文件，目标文件保持不变。
+    临时文件保留目标的扩展名，可直接交给open_file/open_text按扩展名压缩。
+    fsync为True时在替换前后分别同步文件和目录，None时使用FILE_FSYNC配置。
+    用法：
+        with atomic_path(path) as temp_path:
+            with open_text(temp_path, 'w') as f:
+                f.write(content)
+    """
+    file_path = Path(file_path)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    if fsync is None:
+        fsync = FILE_FSYNC
+    
+    fd, temp_name = tempfile.mkstemp(dir=str(file_path.parent), prefix=f".{file_path.name}.",
+                                     suffix=f".tmp{file_path.suffix}")
+    os.close(fd)
+    temp_path = Path(temp_name)
+    try:
+        yield temp_path
+        
+        # mkstemp创建的文件权限为0600，改为与目标文件或普通新建文件一致
+        try:
+            mode = file_path.stat().st_mode & 0o7777
+        except FileNotFoundError:
+            mode = 0o666 & ~_UMASK
+        os.chmod(temp_path, mode)
+        
+        if fsync:
+            _fsync_path(temp_path)
+        os.replace(temp_path, file_path)
+        if fsync:
+            _fsync_path(file_path.parent, directory=True)
+    except BaseException:
+        try:
+            temp_path.unlink()
+        except FileNotFoundError:
+            pass
+        raise
+
+def _write_target(file_path: Path) -> Any:
+    """写入函数使用的目标路径上下文，FILE_ATOMIC_WRITE开启时经临时文件原子替换"""
+    return atomic_path(file_path) if FILE_ATOMIC_WRITE else nullcontext(file_path)
+
+class BatchWriter:
+    """批量追加写入器，将大量小块写入合并为大块顺序写入，适合高频输出的日志和记录流
+    
+    缓冲区达到buffer_size字节，或距上次写盘超过max_delay秒时写入一次；线程安全。
+    压缩扩展名的文件按open_file的规则压缩。可作为上下文管理器使用：
+        with BatchWriter(path) as writer:
+            for event in events:
+                writer.write_record(event)
+    """
+    
+    def __init__(self, file_path: Union[str, Path], buffer_size: int = STREAM_BUFFER_SIZE,
+                 max_delay: Optional[float] = None):
+        """初始化写入器，以追加模式打开文件"""
+        self.file_path = Path(file_path)
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        self.buffer_size = buffer_size
+        self.max_delay = max_delay
+        self.bytes_written = 0
+        self._buffer = []
+        self._buffered = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._file = open_file(self.file_path, 'ab')
+    
+    def write(self, data: Union[str, bytes]) -> None:
+        """追加一块数据，字符串按UTF-8编码"""
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        
+        with self._lock:
+            self._buffer.append(data)
+            self._buffered += len(data)
+            if self._buffered >= self.buffer_size or (
+                    self.max_delay is not None and time.monotonic() - self._last_flush >= self.max_delay):
+                self._flush_buffer()
+    
+    def write_record(self, record: Any) -> None:
+        """追加一条JSON Lines记录"""
+        self.write(_json_line_dumps(record) + b"\n")
+    
+    def _flush_buffer(self) -> None:
+        """将缓冲区合并为一次写入（调用方需持有锁）"""
+        if self._buffer:
+            self._file.write(b"".join(self._buffer))
+            self.bytes_written += self._buffered
+            self._buffer.clear()
+            self._buffered = 0
+        self._last_flush = time.monotonic()
+    
+    def flush(self) -> None:
+        """写出缓冲区中的数据"""
+        with self._lock:
+            self._flush_buffer()
+            self._file.flush()
+    
+    def close(self) -> None:
+        """写出剩余数据并关闭文件"""
+        with self._lock:
+            if self._file.closed:
+                return
+            self._flush_buffer()
+            self._file.close()
+    
+    def __enter__(self) -> "BatchWriter":
+        """进入上下文"""
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        """退出上下文时关闭文件"""
+        self.close()
 
 def read_json(file_path: Union[str, Path]) -> Dict[str, Any]:
     """读取JSON文件"""
@@ -16,7 +279,7 @@ def read_json(file_path: Union[str, Path]) -> Dict[str, Any]:
     if not file_path.exists():
         raise FileNotFoundError(f"文件不存在: {file_path}")
     
-    with open(file_path, 'r', encoding='utf-8') as f:
+    with open_text(file_path) as f:
         return json.load(f)
 
 def write_json(data: Dict[str, Any], file_path: Union[str, Path], indent: int = 2) -> None:
@@ -24,9 +287,60 @@ def write_json(data: Dict[str, Any], file_path: Union[str, Path], indent: int =
     file_path = Path(file_path)
     file_path.parent.mkdir(parents=True, exist_ok=True)
     
-    with open(file_path, 'w', encoding='utf-8') as f:
+    with _write_target(file_path) as target, open_text(target, 'w') as f:
         json.dump(data, f, ensure_ascii=False, indent=indent)
 
+def _json_line_loads(line: bytes) -> Any:
+    """解析一行JSON，优先使用orjson/ujson"""
+    if orjson is not None:
+        return orjson.loads(line)
+    if ujson is not None:
+        return ujson.loads(line)
+    return json.loads(line)
+
+def _json_line_dumps(record: Any) -> bytes:
+    """将一条记录序列化为单行JSON（UTF-8，不转义中文）"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(record)
+        except TypeError:
+            # orjson不支持的类型（如非字符串键）交给标准库处理
+            pass
+    elif ujson is not None:
+        return ujson.dumps(record, ensure_ascii=False).encode('utf-8')
+    return json.dumps(record, ensure_ascii=False).encode('utf-8')
+
+def iter_jsonl(file_path: Union[str, Path]) -> Iterator[Any]:
+    """逐行读取JSON Lines文件，每次返回一条记录，跳过空行"""
+    file_path = Path(file_path)
+    if not file_path.exists():
+        raise FileNotFoundError(f"文件不存在: {file_path}")
+    
+    with open_file(file_path, 'rb') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield _json_line_loads(line)
+
+def write_jsonl(records: Iterable[Any], file_path: Union[str, Path], append: bool = False) -> int:
+    """将记录逐行写入JSON Lines文件，append为True时追加到文件末尾，返回写入的记录数"""
+    file_path = Path(file_path)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    
+    count = 0
+    target_context = nullcontext(file_path) if append else _write_target(file_path)
+    with target_context as target, open_file(target, 'ab' if append else 'wb') as f:
+        for record in records:
+            f.write(_json_line_dumps(record))
+            f.write(b"\n")
+            count += 1
+    
+    return count
+
+def append_jsonl(records: Iterable[Any], file_path: Union[str, Path]) -> int:
+    """追加记录到JSON Lines文件的便捷函数"""
+    return write_jsonl(records, file_path, append=True)
+
 def read_csv(file_path: Union[str, Path]) -> List[Dict[str, str]]:
     """读取CSV文件"""
     file_path = Path(file_path)
@@ -34,7 +348,7 @@ def read_csv(file_path: Union[str, Path]) -> List[Dict[str, str]]:
         raise FileNotFoundError(f"文件不存在: {file_path}")
     
     data = []
-    with open(file_path, 'r', encoding='utf-8') as f:
+    with open_text(file_path) as f:
         reader = csv.DictReader(f)
         for row in reader:
             data.append(row)
@@ -50,26 +364,374 @@ def write_csv(data: List[Dict[str, Any]], file_path: Union[str, Path]) -> None:
         return
     
     fieldnames = data[0].keys()
-    with open(file_path, 'w', encoding='utf-8', newline='') as f:
+    with _write_target(file_path) as target, open_text(target, 'w', newline='') as f:
         writer = csv.DictWriter(f, fieldnames=fieldnames)
         writer.writeheader()
         writer.writerows(data)
 
+def iter_csv(file_path: Union[str, Path],
+             chunk_size: int = 0,
+             as_dict: bool = True) -> Iterator[Any]:
+    """流式读取CSV文件，内存占用与文件大小无关
+    
+    chunk_size为0时逐行返回，大于0时每次返回一个包含chunk_size行的列表；
+    as_dict为False时每行返回值列表（不含表头），避免为每行创建字典。
+    """
+    file_path = Path(file_path)
+    if not file_path.exists():
+        raise FileNotFoundError(f"文件不存在: {file_path}")
+    
+    with open_text(file_path, 'r', newline='') as f:
+        if as_dict:
+            rows = csv.DictReader(f)
+        else:
+            rows = csv.reader(f)
+            next(rows, None)  # 跳过表头
+        
+        if chunk_size <= 0:
+            yield from rows
+            return
+        
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+def read_csv_header(file_path: Union[str, Path]) -> List[str]:
+    """读取CSV文件的表头"""
+    file_path = Path(file_path)
+    if not file_path.exists():
+        raise FileNotFoundError(f"文件不存在: {file_path}")
+    
+    with open_text(file_path, 'r', newline='') as f:
+        return next(csv.reader(f), [])
+
+class CsvWriter:
+    """增量CSV写入器，边生成边写入，无需先在内存中构建完整列表
+    
+    未指定fieldnames时使用第一行的键作为表头。可作为上下文管理器使用：
+        with CsvWriter(path) as writer:
+            for rows in batches:
+                writer.write_rows(rows)
+    """
+    
+    def __init__(self, file_path: Union[str, Path], fieldnames: Optional[List[str]] = None):
+        """初始化写入器，表头在写入第一行时输出"""
+        self.file_path = Path(file_path)
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        self.fieldnames = list(fieldnames) if fieldnames else None
+        self.rows_written = 0
+        self._file = open_text(self.file_path, 'w', newline='')
+        self._writer = None
+    
+    def _ensure_writer(self, first_row: Dict[str, Any]) -> csv.DictWriter:
+        """首次写入时创建DictWriter并输出表头"""
+        if self._writer is None:
+            if self.fieldnames is None:
+                self.fieldnames = list(first_row.keys())
+            self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames)
+            self._writer.writeheader()
+        return self._writer
+    
+    def write_row(self, row: Dict[str, Any]) -> None:
+        """写入一行"""
+        self._ensure_writer(row).writerow(row)
+        self.rows_written += 1
+    
+    def write_rows(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """写入多行，rows可以是生成器"""
+        for row in rows:
+            self.write_row(row)
+    
+    def close(self) -> None:
+        """关闭文件；指定了表头但没有写入任何行时只输出表头"""
+        if self._file.closed:
+            return
+        if self._writer is None and self.fieldnames:
+            csv.DictWriter(self._file, fieldnames=self.fieldnames).writeheader()
+        self._file.close()
+    
+    def __enter__(self) -> "CsvWriter":
+        """进入上下文"""
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        """退出上下文时关闭文件"""
+        self.close()
+
+def _has_pyarrow() -> bool:
+    """检查是否安装了pyarrow"""
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def read_table(file_path: Union[str, Path],
+               usecols: Optional[List[str]] = None,
+               dtype: Optional[Dict[str, Any]] = None) -> "pd.DataFrame":
+    """按列读取CSV文件为DataFrame，自动推断或按dtype指定列类型
+    
+    安装了pyarrow时使用多线程的pyarrow引擎，否则使用pandas的C引擎；
+    usecols只解析需要的列，可显著降低宽表的解析时间和内存。
+    """
+    import pandas as pd
+    
+    file_path = Path(file_path)
+    if not file_path.exists():
+        raise FileNotFoundError(f"文件不存在: {file_path}")
+    
+    compression = detect_compression(file_path)
+    if _has_pyarrow():
+        try:
+            return pd.read_csv(file_path, usecols=usecols, dtype=dtype,
+                               compression=compression, engine="pyarrow")
+        except ValueError:
+            # pyarrow引擎不支持的参数组合回退到C引擎
+            pass
+    return pd.read_csv(file_path, usecols=usecols, dtype=dtype,
+                       compression=compression, engine="c")
+
+def read_csv_columns(file_path: Union[str, Path],
+                     usecols: Optional[List[str]] = None,
+                     dtype: Optional[Dict[str, Any]] = None) -> Dict[str, "np.ndarray"]:
+    """按列读取CSV文件，返回 列名 -> NumPy数组 的列式字典"""
+    df = read_table(file_path, usecols, dtype)
+    return {column: df[column].to_numpy() for column in df.columns}
+
+# ==================== Parquet / Feather ====================
+# 列式格式扩展名，.arrow与.feather均为Arrow IPC文件格式
+COLUMNAR_FORMATS = ['.parquet', '.feather', '.arrow']
+
+def _import_pyarrow() -> Any:
+    """导入pyarrow，未安装时给出安装提示"""
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("缺少可选依赖 pyarrow，请先安装: pip install pyarrow")
+    return pyarrow
+
+def _to_arrow_table(data: Any) -> Any:
+    """将DataFrame、字典列表或Arrow表转换为Arrow表"""
+    pa = _import_pyarrow()
+    if isinstance(data, pa.Table):
+        return data
+    if isinstance(data, list):
+        return pa.Table.from_pylist(data)
+    return pa.Table.from_pandas(data, preserve_index=False)
+
+def read_parquet(file_path: Union[str, Path], columns: Optional[List[str]] = None) -> "pd.DataFrame":
+    """读取Parquet文件为DataFrame，columns只读取指定列"""
+    _import_pyarrow()
+    import pyarrow.parquet as pq
+    
+    file_path = Path(file_path)
+    if not file_path.exists():
+        raise FileNotFoundError(f"文件不存在: {file_path}")
+    
+    return pq.read_table(file_path, columns=columns, memory_map=True).to_pandas()
+
+def iter_parquet(file_path: Union[str, Path], columns: Optional[List[str]] = None) -> Iterator["pd.DataFrame"]:
+    """按行组逐块读取Parquet文件，每次返回一个行组的DataFrame，内存占用与行组大小相当"""
+    _import_pyarrow()
+    import pyarrow.parquet as pq
+    
+    file_path = Path(file_path)
+    if not file_path.exists():
+        raise FileNotFoundError(f"文件不存在: {file_path}")
+    
+    with pq.ParquetFile(file_path, memory_map=True) as parquet_file:
+        for index in range(parquet_file.num_row_groups):
+            yield parquet_file.read_row_group(index, columns=columns).to_pandas()
+
+def write_parquet(data: Any, file_path: Union[str, Path], row_group_size: Optional[int] = None) -> None:
+    """写入Parquet文件（zstd压缩），data可以是DataFrame或字典列表，row_group_size控制每个行组的行数"""
+    _import_pyarrow()
+    import pyarrow.parquet as pq
+    
+    file_path = Path(file_path)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    
+    with _write_target(file_path) as target:
+        pq.write_table(_to_arrow_table(data), target, row_group_size=row_group_size, compression="zstd")
+
+def read_feather(file_path: Union[str, Path], columns: Optional[List[str]] = None) -> "pd.DataFrame":
+    """读取Feather/Arrow IPC文件为DataFrame，未压缩的文件通过内存映射读取"""
+    _import_pyarrow()
+    import pyarrow.feather as feather
+    
+    file_path = Path(file_path)
+    if not file_path.exists():
+        raise FileNotFoundError(f"文件不存在: {file_path}")
+    
+    return feather.read_table(file_path, columns=columns, memory_map=True).to_pandas()
+
+def write_feather(data: Any, file_path: Union[str, Path], compression: Optional[str] = None) -> None:
+    """写入Feather/Arrow IPC文件
+    
+    compression默认为None（不压缩），以便读取时直接内存映射；可选lz4或zstd以减小文件体积。
+    """
+    _import_pyarrow()
+    import pyarrow.feather as feather
+    
+    file_path = Path(file_path)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    
+    with _write_target(file_path) as target:
+        feather.write_feather(_to_arrow_table(data), target, compression=compression or "uncompressed")
+
+def _read_frame(file_path: Union[str, Path]) -> "pd.DataFrame":
+    """按扩展名将数据文件读取为DataFrame"""
+    import pandas as pd
+    
+    extension = get_data_extension(file_path)
+    if extension == '.csv':
+        return read_table(file_path)
+    if extension == '.json':
+        return pd.DataFrame(read_json(file_path))
+    if extension == '.jsonl':
+        return pd.DataFrame(list(iter_jsonl(file_path)))
+    if extension == '.parquet':
+        return read_parquet(file_path)
+    if extension in ('.feather', '.arrow'):
+        return read_feather(file_path)
+    if extension == '.xlsx':
+        return pd.read_excel(file_path)
+    if extension == '.pickle':
+        with open_file(file_path, 'rb') as f:
+            return pd.read_pickle(f)
+    raise ValueError(f"无法读取为DataFrame的文件格式: {file_path}")
+
+def convert(src: Union[str, Path], dst: Optional[Union[str, Path]] = None) -> Path:
+    """转换数据文件格式，按扩展名识别源格式和目标格式，返回目标文件路径
+    
+    dst为None时转换为CACHE_DIR/tables/<文件名>.feather。目标文件比源文件新时跳过转换，
+    因此可在每次启动时调用，只有首次或源文件更新后才会重新解析。
+    """
+    src = Path(src)
+    if not src.exists():
+        raise FileNotFoundError(f"文件不存在: {src}")
+    dst = Path(dst) if dst is not None else CACHE_DIR / "tables" / f"{src.name}.feather"
+    
+    if dst.exists() and dst.stat().st_mtime >= src.stat().st_mtime:
+        return dst
+    
+    df = _read_frame(src)
+    extension = get_data_extension(dst)
+    if extension == '.parquet':
+        write_parquet(df, dst)
+    elif extension in ('.feather', '.arrow'):
+        write_feather(df, dst)
+    elif extension == '.csv':
+        with _write_target(dst) as target, open_text(target, 'w', newline='') as f:
+            df.to_csv(f, index=False)
+    elif extension in ('.json', '.jsonl'):
+        with _write_target(dst) as target, open_text(target, 'w') as f:
+            df.to_json(f, orient='records', force_ascii=False, lines=extension == '.jsonl')
+    else:
+        raise ValueError(f"不支持的目标格式: {dst}")
+    
+    return dst
+
 def read_text(file_path: Union[str, Path]) -> str:
     """读取文本文件"""
     file_path = Path(file_path)
     if not file_path.exists():
         raise FileNotFoundError(f"文件不存在: {file_path}")
     
-    with open(file_path, 'r', encoding='utf-8') as f:
+    with open_text(file_path) as f:
         return f.read()
 
+@contextmanager
+def open_mmap(file_path: Union[str, Path]) -> Iterator[memoryview]:
+    """以只读内存映射打开文件，返回memoryview，切片访问不会复制整个文件
+    
+    用法：
+        with open_mmap(path) as view:
+            header = bytes(view[:16])
+    退出上下文前需释放从view派生的所有切片引用。压缩文件无法映射，需使用open_file流式读取。
+    """
+    file_path = Path(file_path)
+    if not file_path.exists():
+        raise FileNotFoundError(f"文件不存在: {file_path}")
+    if file_path.suffix.lower() in COMPRESSION_EXTENSIONS:
+        raise ValueError(f"压缩文件不支持内存映射: {file_path}")
+    
+    with open(file_path, 'rb') as f:
+        # 空文件无法映射，返回空视图
+        if os.fstat(f.fileno()).st_size == 0:
+            yield memoryview(b"")
+            return
+        
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                yield view
+            finally:
+                view.release()
+
+def read_bytes_range(file_path: Union[str, Path], offset: int, length: int) -> bytes:
+    """随机读取文件中[offset, offset+length)范围的字节，只复制该范围的数据"""
+    with open_mmap(file_path) as view:
+        return bytes(view[offset:offset + length])
+
+def iter_lines_mmap(file_path: Union[str, Path], encoding: Optional[str] = 'utf-8') -> Iterator[Any]:
+    """基于内存映射逐行遍历文件（不含换行符），encoding为None时返回bytes"""
+    with open_mmap(file_path) as view:
+        if not len(view):
+            return
+        
+        mapped = view.obj
+        position, size = 0, len(mapped)
+        while position < size:
+            end = mapped.find(b"\n", position)
+            if end == -1:
+                end = size
+            line = mapped[position:end]
+            if line.endswith(b"\r"):
+                line = line[:-1]
+            yield line.decode(encoding) if encoding else line
+            position = end + 1
+
+def grep_file(file_path: Union[str, Path], pattern: Union[str, bytes]) -> Iterator[Tuple[int, bytes]]:
+    """在文件中搜索正则表达式，返回匹配行的(起始偏移, 行内容bytes)
+    
+    正则直接在内存映射上匹配，只复制命中的行；按多行模式编译，^和$匹配每一行的行首和行尾。
+    """
+    if isinstance(pattern, str):
+        pattern = pattern.encode('utf-8')
+    regex = re.compile(pattern, re.MULTILINE)
+    
+    with open_mmap(file_path) as view:
+        if not len(view):
+            return
+        
+        mapped = view.obj
+        position = 0
+        while True:
+            match = regex.search(mapped, position)
+            if match is None:
+                return
+            line_start = mapped.rfind(b"\n", 0, match.start()) + 1
+            line_end = mapped.find(b"\n", match.end())
+            if line_end == -1:
+                line_end = len(mapped)
+            yield line_start, mapped[line_start:line_end].rstrip(b"\r")
+            # 每行只返回一次
+            position = line_end + 1
+            if position >= len(mapped):
+                return
+
 def write_text(content: str, file_path: Union[str, Path]) -> None:
     """写入文本文件"""
     file_path = Path(file_path)
     file_path.parent.mkdir(parents=True, exist_ok=True)
     
-    with open(file_path, 'w', encoding='utf-8') as f:
+    with _write_target(file_path) as target, open_text(target, 'w') as f:
         f.write(content)
 
 def get_file_extension(file_path: Union[str, Path]) -> str:
@@ -77,8 +739,8 @@ def get_file_extension(file_path: Union[str, Path]) -> str:
     return Path(file_path).suffix.lower()
 
 def is_supported_format(file_path: Union[str, Path], supported_formats: List[str]) -> bool:
-    """检查文件格式是否支持"""
-    extension = get_file_extension(file_path)
+    """检查文件格式是否支持，压缩文件按内层格式判断（如data.csv.gz视为.csv）"""
+    extension = get_data_extension(file_path)
     return extension in supported_formats
 
 def clean_filename(filename: str) -> str:
@@ -108,4 +770,312 @@ def format_file_size(size_bytes: int) -> str:
     i = int(math.floor(math.log(size_bytes, 1024)))
     p = math.pow(1024, i)
     s = round(size_bytes / p, 2)
-    return f"{s} {size_names[i]}" 
\ No newline at end of file
+    return f"{s} {size_names[i]}" 
+
+# ==================== 批量并行加载 ====================
+@dataclass
+class LoadOptions:
+    """批量加载的可选配置"""
+    workers: Optional[int] = None   # 并发数，None时为CPU核数（线程模式最多32）
+    mode: str = "thread"            # 并发方式：thread（I/O密集）或 process（解析密集）
+    ordered: bool = True            # True按输入顺序返回，False按完成顺序返回
+    as_frame: bool = False          # True时每个文件读取为DataFrame
+    concat: bool = False            # True时load_many将所有DataFrame合并为一个（隐含as_frame）
+
+def _load_file(file_path: str, as_frame: bool) -> Any:
+    """按扩展名读取单个数据文件（模块级函数，可被进程池调用）"""
+    if as_frame:
+        return _read_frame(file_path)
+    
+    extension = get_data_extension(file_path)
+    if extension == '.csv':
+        return read_csv(file_path)
+    if extension == '.json':
+        return read_json(file_path)
+    if extension == '.jsonl':
+        return list(iter_jsonl(file_path))
+    if extension == '.txt':
+        return read_text(file_path)
+    if extension == '.pickle':
+        with open_file(file_path, 'rb') as f:
+            return pickle.load(f)
+    if extension == '.xlsx' or extension in COLUMNAR_FORMATS:
+        # 表格和列式格式始终返回DataFrame
+        return _read_frame(file_path)
+    raise ValueError(f"不支持的文件格式: {file_path}")
+
+def _resolve_sources(sources: Union[str, Path, Iterable[Union[str, Path]]]) -> List[Path]:
+    """将glob模式或路径列表展开为文件列表
+    
+    单个模式或路径（无论是否含通配符）的相对路径均基于DATA_DIR；路径列表按原样使用。
+    """
+    if isinstance(sources, (str, Path)):
+        pattern = str(sources)
+        if not glob.has_magic(pattern):
+            sources = [pattern if os.path.isabs(pattern) else DATA_DIR / pattern]
+        else:
+            if not os.path.isabs(pattern):
+                pattern = os.path.join(glob.escape(str(DATA_DIR)), pattern)
+            # glob匹配时跳过不支持的格式
+            return [Path(path) for path in sorted(glob.glob(pattern, recursive=True))
+                    if os.path.isfile(path) and is_supported_format(path, SUPPORTED_DATA_FORMATS)]
+    
+    # 明确指定的路径格式不支持时报错
+    paths = [Path(path) for path in sources]
+    for path in paths:
+        if not is_supported_format(path, SUPPORTED_DATA_FORMATS):
+            raise ValueError(f"不支持的文件格式: {path}")
+    return paths
+
+def iter_load(sources: Union[str, Path, Iterable[Union[str, Path]]],
+              options: Optional[LoadOptions] = None) -> Iterator[Tuple[Path, Any]]:
+    """并发读取多个数据文件，逐个返回(路径, 数据)
+    
+    sources可以是glob模式或单个路径（如"*.csv"、"a.csv"，相对DATA_DIR）或路径列表，按扩展名选择读取方式。
+    同时提交的任务数限制为并发数的2倍，消费者较慢时不会把所有结果堆积在内存中。
+    """
+    options = options or LoadOptions()
+    paths = _resolve_sources(sources)
+    if not paths:
+        return
+    
+    as_frame = options.as_frame or options.concat
+    if options.mode == "process":
+        workers = options.workers or os.cpu_count() or 1
+        executor = ProcessPoolExecutor(max_workers=workers)
+    elif options.mode == "thread":
+        workers = options.workers or min(32, (os.cpu_count() or 1) + 4)
+        executor = ThreadPoolExecutor(max_workers=workers)
+    else:
+        raise ValueError(f"不支持的并发方式: {options.mode}")
+    
+    window = workers * 2
+    pending_paths = iter(paths)
+    future_paths = {}
+    
+    def submit_next() -> Any:
+        """提交下一个文件的读取任务，没有剩余文件时返回None"""
+        path = next(pending_paths, None)
+        if path is None:
+            return None
+        future = executor.submit(_load_file, str(path), as_frame)
+        future_paths[future] = path
+        return future
+    
+    with executor:
+        initial = [future for future in (submit_next() for _ in range(window)) if future is not None]
+        
+        if options.ordered:
+            in_flight = deque(initial)
+            while in_flight:
+                future = in_flight.popleft()
+                next_future = submit_next()
+                if next_future is not None:
+                    in_flight.append(next_future)
+                yield future_paths.pop(future), future.result()
+        else:
+            in_flight = set(initial)
+            while in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    next_future = submit_next()
+                    if next_future is not None:
+                        in_flight.add(next_future)
+                    yield future_paths.pop(future), future.result()
+
+def load_many(sources: Union[str, Path, Iterable[Union[str, Path]]],
+              options: Optional[LoadOptions] = None) -> Any:
+    """并发读取多个数据文件
+    
+    返回[(路径, 数据), ...]；options.concat为True时返回合并后的单个DataFrame。
+    """
+    options = options or LoadOptions()
+    results = iter_load(sources, options)
+    
+    if options.concat:
+        import pandas as pd
+        frames = [frame for _, frame in results]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    
+    return list(results)
+
+# ==================== 文件指纹 ====================
+class FileFingerprint(NamedTuple):
+    """文件指纹：大小、纳秒级修改时间和可选的内容哈希"""
+    size: int
+    mtime_ns: int
+    digest: Optional[str] = None
+
+def hash_file(file_path: Union[str, Path]) -> str:
+    """按块流式计算文件内容哈希，优先使用xxhash（xxh3_128），否则使用blake2b"""
+    hasher = xxhash.xxh3_128() if xxhash is not None else hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb', buffering=0) as f:
+        buffer = bytearray(STREAM_BUFFER_SIZE)
+        view = memoryview(buffer)
+        while True:
+            count = f.readinto(buffer)
+            if not count:
+                break
+            hasher.update(view[:count])
+    return hasher.hexdigest()
+
+def file_fingerprint(file_path: Union[str, Path], content_hash: bool = False) -> FileFingerprint:
+    """获取文件指纹，content_hash为True时同时计算内容哈希"""
+    stat = os.stat(file_path)
+    digest = hash_file(file_path) if content_hash else None
+    return FileFingerprint(stat.st_size, stat.st_mtime_ns, digest)
+
+class FileManifest:
+    """文件指纹清单，保存在CACHE_DIR/manifests/<name>.json，用于增量处理
+    
+    先按大小和修改时间快速判断；开启content_hash时，修改时间变化但大小相同的文件再比较内容哈希，
+    避免仅被touch或重新拷贝的文件被重复处理。用法：
+        manifest = FileManifest("cleanup_data")
+        for path in manifest.changed(files):
+            process(path)
+            manifest.mark(path)
+        manifest.save()
+    """
+    
+    def __init__(self, name: str, content_hash: bool = False,
+                 manifest_dir: Optional[Union[str, Path]] = None):
+        """加载清单，文件不存在或损坏时视为空清单"""
+        self.content_hash = content_hash
+        self.manifest_path = Path(manifest_dir or CACHE_DIR / "manifests") / f"{name}.json"
+        self._entries = {}
+        self._current = {}
+        
+        if self.manifest_path.exists():
+            try:
+                data = read_json(self.manifest_path)
+                self._entries = {path: FileFingerprint(*values) for path, values in data.get("files", {}).items()}
+            except Exception as e:
+                print(f"读取文件清单失败: {e}")
+    
+    @staticmethod
+    def _key(file_path: Union[str, Path]) -> str:
+        """清单中使用的文件键（绝对路径）"""
+        return str(Path(file_path).resolve())
+    
+    def _is_changed(self, key: str, file_path: Path) -> bool:
+        """比较文件当前状态与清单记录，并暂存当前指纹"""
+        stat = file_path.stat()
+        previous = self._entries.get(key)
+        current = FileFingerprint(stat.st_size, stat.st_mtime_ns)
+        
+        if previous is not None and previous.size == current.size and previous.mtime_ns == current.mtime_ns:
+            self._current[key] = previous
+            return False
+        
+        if self.content_hash:
+            current = current._replace(digest=hash_file(file_path))
+        self._current[key] = current
+        
+        # 修改时间变化但内容哈希一致时视为未变化，并更新记录的修改时间，下次无需再计算哈希
+        if previous is not None and current.digest is not None and previous.digest == current.digest:
+            self._entries[key] = current
+            return False
+        return True
+    
+    def changed(self, paths: Iterable[Union[str, Path]]) -> List[Path]:
+        """返回自上次记录以来新增或修改过的文件"""
+        return [Path(path) for path in paths if self._is_changed(self._key(path), Path(path))]
+    
+    def removed(self, paths: Iterable[Union[str, Path]]) -> List[Path]:
+        """返回清单中有记录但不在paths中的文件（已删除或不再处理）"""
+        current_keys = {self._key(path) for path in paths}
+        return [Path(key) for key in self._entries if key not in current_keys]
+    
+    def mark(self, file_path: Union[str, Path]) -> None:
+        """记录文件已处理，使用changed()时暂存的指纹，未检查过的文件重新计算"""
+        key = self._key(file_path)
+        fingerprint = self._current.pop(key, None)
+        if fingerprint is None or (self.content_hash and fingerprint.digest is None):
+            fingerprint = file_fingerprint(file_path, self.content_hash)
+        self._entries[key] = fingerprint
+    
+    def forget(self, paths: Iterable[Union[str, Path]]) -> None:
+        """从清单中移除文件记录"""
+        for path in paths:
+            self._entries.pop(self._key(path), None)
+    
+    def save(self) -> bool:
+        """原子写入清单文件"""
+        try:
+            write_json({"files": {key: list(value) for key, value in self._entries.items()}},
+                       self.manifest_path, indent=None)
+            return True
+        except Exception as e:
+            print(f"保存文件清单失败: {e}")
+            return False
+
+# ==================== 目录扫描 ====================
+class FileRecord(NamedTuple):
+    """目录扫描结果：文件路径（字符串）、大小和修改时间"""
+    path: str
+    size: int
+    mtime: float
+
+@dataclass
+class ScanOptions:
+    """目录扫描的可选配置"""
+    patterns: Optional[List[str]] = None   # 文件名通配符（如["*.csv", "*.json"]），None表示全部文件
+    recursive: bool = True                 # 是否递归子目录（不跟随目录符号链接）
+    min_size: int = 0                      # 最小文件大小（字节）
+    newer_than: Optional[float] = None     # 只返回修改时间晚于该时间戳的文件
+    include_hidden: bool = False           # 是否包含以.开头的文件和目录
+    stat_workers: int = 0                  # 并发stat的线程数，网络文件系统上可加快扫描，0表示不并发
+
+def _stat_entry(dir_entry: os.DirEntry) -> Optional[os.stat_result]:
+    """获取目录项的stat信息（DirEntry会缓存结果），扫描期间被删除时返回None"""
+    try:
+        return dir_entry.stat()
+    except FileNotFoundError:
+        return None
+
+def scan_files(root: Union[str, Path], options: Optional[ScanOptions] = None) -> Iterator[FileRecord]:
+    """基于os.scandir遍历目录，返回符合条件的文件记录
+    
+    先按文件名过滤再获取stat，复用DirEntry缓存的stat信息，不为每个文件创建Path对象。
+    无权限访问的子目录会被跳过。
+    """
+    options = options or ScanOptions()
+    name_regex = None
+    if options.patterns:
+        name_regex = re.compile("|".join(fnmatch.translate(pattern) for pattern in options.patterns))
+    
+    executor = ThreadPoolExecutor(max_workers=options.stat_workers) if options.stat_workers > 0 else None
+    directories = [str(root)]
+    try:
+        while directories:
+            directory = directories.pop()
+            candidates = []
+            try:
+                with os.scandir(directory) as it:
+                    for dir_entry in it:
+                        if not options.include_hidden and dir_entry.name.startswith('.'):
+                            continue
+                        if dir_entry.is_dir(follow_symlinks=False):
+                            if options.recursive:
+                                directories.append(dir_entry.path)
+                        elif name_regex is None or name_regex.match(dir_entry.name):
+                            candidates.append(dir_entry)
+            except (PermissionError, FileNotFoundError):
+                continue
+            
+            stats = executor.map(_stat_entry, candidates) if executor else map(_stat_entry, candidates)
+            for dir_entry, stat in zip(candidates, stats):
+                if stat is None or not dir_entry.is_file():
+                    continue
+                if stat.st_size < options.min_size:
+                    continue
+                if options.newer_than is not None and stat.st_mtime <= options.newer_than:
+                    continue
+                yield FileRecord(dir_entry.path, stat.st_size, stat.st_mtime)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+def dir_size(root: Union[str, Path], options: Optional[ScanOptions] = None) -> int:
+    """统计目录下符合条件的文件总大小（字节），默认递归所有非隐藏文件"""
+    return sum(record.size for record in scan_files(root, options))